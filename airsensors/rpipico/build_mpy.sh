@@ -0,0 +1,76 @@
+#!/bin/bash
+# Script to precompile the Pico firmware to .mpy bytecode
+# Shipping .mpy skips the on-device parser/compiler pass at every boot,
+# lowering the boot-time heap peak and import time.
+#
+# Requires mpy-cross matching the MicroPython version on the Pico
+# (pip install mpy-cross==<firmware version>).
+# Run with DEPLOY=1 to copy the build to a connected Pico via mpremote.
+
+set -e  # Exit on error
+
+cd "$(dirname "$0")"
+
+BUILD_DIR="build"
+# -O3 drops line-number info and __debug__ blocks; -march is needed because
+# main.py uses @micropython.native (RP2040 is a Cortex-M0+, armv6m)
+MPY_FLAGS="-O3 -march=armv6m"
+
+echo "=========================================="
+echo "Compiling Pico files to .mpy"
+echo "=========================================="
+echo ""
+
+if ! command -v mpy-cross > /dev/null 2>&1; then
+    echo "ERROR: mpy-cross not found!"
+    echo ""
+    echo "Install it with: pip install mpy-cross"
+    exit 1
+fi
+
+rm -rf "$BUILD_DIR"
+mkdir -p "$BUILD_DIR/lib"
+
+# The firmware only runs main.py from source, so the monitor code is compiled
+# as a module and main.py becomes a stub that imports it
+echo "[1/3] Compiling main.py -> monitor.mpy..."
+mpy-cross $MPY_FLAGS -s monitor.py -o "$BUILD_DIR/monitor.mpy" main.py
+cat > "$BUILD_DIR/main.py" << 'EOF'
+# Generated by build_mpy.sh - monitoring code is precompiled in monitor.mpy
+from monitor import auto_start_monitoring
+
+if __name__ == "__main__":
+    auto_start_monitoring()
+EOF
+
+echo "[2/3] Compiling lib/*.py..."
+for src in lib/*.py; do
+    name="$(basename "$src" .py)"
+    mpy-cross $MPY_FLAGS -s "$name.py" -o "$BUILD_DIR/lib/$name.mpy" "$src"
+done
+
+echo "[3/3] Copying boot.py..."
+cp boot.py "$BUILD_DIR/boot.py"
+
+echo ""
+echo "✓ Build written to $BUILD_DIR/"
+
+if [ "${DEPLOY:-0}" = "1" ]; then
+    echo ""
+    echo "Deploying to Pico..."
+    # Remove old sources first: a lib/*.py on the Pico is found before lib/*.mpy
+    mpremote connect auto exec "import os
+for f in ('lib/bm280_spi.py', 'lib/mq135.py', 'lib/config.py', 'lib/__init__.py'):
+    try:
+        os.remove(f)
+    except OSError:
+        pass" || true
+    mpremote connect auto mkdir :lib > /dev/null 2>&1 || true
+    mpremote connect auto cp "$BUILD_DIR/monitor.mpy" :monitor.mpy
+    for mpy in "$BUILD_DIR"/lib/*.mpy; do
+        mpremote connect auto cp "$mpy" ":lib/$(basename "$mpy")"
+    done
+    mpremote connect auto cp "$BUILD_DIR/main.py" :main.py
+    mpremote connect auto cp "$BUILD_DIR/boot.py" :boot.py
+    echo "✓ Deployed. Monitor the output with: mpremote connect auto"
+fi
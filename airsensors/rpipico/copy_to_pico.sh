@@ -30,18 +30,22 @@ echo ""
 echo "[1/6] Copying main.py..."
 mpremote connect auto cp main.py :main.py
 
-# Copy library files
-echo "[2/6] Copying lib/bm280_spi.py..."
-mpremote connect auto cp lib/bm280_spi.py :lib/bm280_spi.py
+# Copy library files (skipped when lib/ is frozen into the firmware, see manifest.py)
+if [ "${FROZEN_LIB:-0}" = "1" ]; then
+    echo "[2-5/6] Skipping lib/ (FROZEN_LIB=1, using modules frozen into firmware)"
+else
+    echo "[2/6] Copying lib/bm280_spi.py..."
+    mpremote connect auto cp lib/bm280_spi.py :lib/bm280_spi.py
 
-echo "[3/6] Copying lib/mq135.py..."
-mpremote connect auto cp lib/mq135.py :lib/mq135.py
+    echo "[3/6] Copying lib/mq135.py..."
+    mpremote connect auto cp lib/mq135.py :lib/mq135.py
 
-echo "[4/6] Copying lib/config.py..."
-mpremote connect auto cp lib/config.py :lib/config.py
+    echo "[4/6] Copying lib/config.py..."
+    mpremote connect auto cp lib/config.py :lib/config.py
 
-echo "[5/6] Copying lib/__init__.py..."
-mpremote connect auto cp lib/__init__.py :lib/__init__.py
+    echo "[5/6] Copying lib/__init__.py..."
+    mpremote connect auto cp lib/__init__.py :lib/__init__.py
+fi
 
 echo "[6/6] Copying boot.py..."
 mpremote connect auto cp boot.py :boot.py
@@ -4,12 +4,13 @@ Library for reading temperature, humidity, and pressure from BM280 sensor via SP
 """
 
 import time
+import micropython
 from machine import SPI, Pin
 
 try:
     from lib.config import (
         I2C_RECOVERY_RETRIES, I2C_OPERATION_TIMEOUT_MS, I2C_STATUS_CHECK_TIMEOUT_MS,
-        SPI_POLARITY, SPI_PHASE
+        SPI_POLARITY, SPI_PHASE, SPI_CS_GUARD_US
     )
 except ImportError:
     # Fallback defaults if config not available
@@ -18,6 +19,7 @@ except ImportError:
     I2C_STATUS_CHECK_TIMEOUT_MS = 500
     SPI_POLARITY = 0
     SPI_PHASE = 0
+    SPI_CS_GUARD_US = 10
 
 # BM280 family chip IDs (hardware-specific, not configurable)
 BM280_CHIP_ID_HUMIDITY = 0x60
@@ -29,6 +31,9 @@ BM280_RESET_VALUE = 0xB6
 # Float comparison epsilon
 EPSILON = 1e-6
 
+# Register access retry backoff: 5 ms, then 10 ms, ... (doubled per attempt)
+RETRY_BASE_MS = 5
+
 class BM280_SPI:
     def __init__(self, spi, cs_pin):
         """
@@ -51,6 +56,10 @@ class BM280_SPI:
         self.cs = cs_pin
         self.cs.on()  # Deselect by default
 
+        # Single-register transfer buffers, reused so status polling doesn't allocate
+        self._reg_tx = bytearray(2)
+        self._reg_rx = bytearray(2)
+
         # Verify chip ID (0x60 = humidity-capable, 0x58 = pressure-only)
         chip_id = self._read_register(0xD0)
         if chip_id not in (BM280_CHIP_ID_HUMIDITY, BM280_CHIP_ID_PRESSURE_ONLY):
@@ -64,6 +73,12 @@ class BM280_SPI:
         self.chip_id = chip_id
         self.has_humidity = chip_id == BM280_CHIP_ID_HUMIDITY
 
+        # Data burst buffers (address byte + 0xF7..0xFE, or 0xF7..0xFC without humidity),
+        # allocated once so read_raw_data() runs without heap allocations
+        data_len = 8 if self.has_humidity else 6
+        self._data_tx = bytearray(data_len + 1)
+        self._data_rx = bytearray(data_len + 1)
+
         # Reset sensor
         self.reset()
         if not self.wait_for_ready(timeout_ms=I2C_STATUS_CHECK_TIMEOUT_MS):
@@ -88,15 +103,16 @@ class BM280_SPI:
                 # 3. Read response byte
                 # 4. Pull CS high
                 self.cs.off()
-                time.sleep(0.001)  # Small delay after CS
+                time.sleep_us(SPI_CS_GUARD_US)  # Small delay after CS
 
                 # Send address and read in single transaction
-                tx_buf = bytearray([reg | 0x80, 0x00])
-                rx_buf = bytearray(2)
+                tx_buf = self._reg_tx
+                rx_buf = self._reg_rx
+                tx_buf[0] = reg | 0x80
                 self.spi.write_readinto(tx_buf, rx_buf)
                 result = rx_buf[1]  # Second byte is the data
 
-                time.sleep(0.001)  # Small delay before CS high
+                time.sleep_us(SPI_CS_GUARD_US)  # Small delay before CS high
                 self.cs.on()
 
                 if time.ticks_diff(time.ticks_ms(), start_time) > I2C_OPERATION_TIMEOUT_MS:
@@ -106,13 +122,23 @@ class BM280_SPI:
                 self.cs.on()
                 last_error = e
                 if attempt < I2C_RECOVERY_RETRIES - 1:
-                    time.sleep(0.01)
+                    time.sleep_ms(RETRY_BASE_MS << attempt)
                 else:
                     raise last_error
         raise last_error
 
     def _read_registers(self, reg, count):
         """Read multiple consecutive registers via SPI"""
+        rx_buf = bytearray(count + 1)
+        self._read_registers_into(reg, bytearray(count + 1), rx_buf)
+        return rx_buf[1:]  # Skip first byte (response to address)
+
+    def _read_registers_into(self, reg, tx_buf, rx_buf):
+        """Read consecutive registers via SPI into caller-provided buffers.
+
+        tx_buf and rx_buf must be the same length; rx_buf[0] receives the byte
+        clocked in during the address phase, register data starts at rx_buf[1].
+        """
         last_error = None
         for attempt in range(I2C_RECOVERY_RETRIES):
             try:
@@ -120,26 +146,23 @@ class BM280_SPI:
 
                 # BM280 SPI read protocol for multiple bytes
                 self.cs.off()
-                time.sleep(0.001)
+                time.sleep_us(SPI_CS_GUARD_US)
 
                 # Send address byte (MSB=1 for read) + padding for data bytes
-                tx_buf = bytearray(count + 1)
                 tx_buf[0] = reg | 0x80
-                rx_buf = bytearray(count + 1)
                 self.spi.write_readinto(tx_buf, rx_buf)
-                result = rx_buf[1:]  # Skip first byte (response to address)
 
-                time.sleep(0.001)
+                time.sleep_us(SPI_CS_GUARD_US)
                 self.cs.on()
 
                 if time.ticks_diff(time.ticks_ms(), start_time) > I2C_OPERATION_TIMEOUT_MS:
                     raise OSError("SPI read timeout")
-                return result
+                return
             except (OSError, ValueError) as e:
                 self.cs.on()
                 last_error = e
                 if attempt < I2C_RECOVERY_RETRIES - 1:
-                    time.sleep(0.01)
+                    time.sleep_ms(RETRY_BASE_MS << attempt)
                 else:
                     raise last_error
         raise last_error
@@ -164,19 +187,25 @@ class BM280_SPI:
                 self.cs.on()  # Ensure CS is deselected
                 last_error = e
                 if attempt < I2C_RECOVERY_RETRIES - 1:
-                    time.sleep(0.01)
+                    time.sleep_ms(RETRY_BASE_MS << attempt)
                 else:
                     raise last_error
         raise last_error
 
     def _read_calibration_data(self):
         """Read calibration coefficients"""
+        # 0x88-0x9F hold T/P calibration and 0xA1 holds dig_H1, so a humidity
+        # variant reads 0x88-0xA1 as one 26-byte burst instead of two reads
+        calib = self._read_registers(0x88, 26 if self.has_humidity else 24)
+
         # Temperature calibration
-        calib = self._read_registers(0x88, 24)
 
         self.dig_T1 = calib[1] << 8 | calib[0]
         self.dig_T2 = self._to_signed(calib[3] << 8 | calib[2], 16)
         self.dig_T3 = self._to_signed(calib[5] << 8 | calib[4], 16)
+        # Calibration-only terms of the temperature formula, computed once
+        self._t1_1024 = self.dig_T1 / 1024.0
+        self._t1_8192 = self.dig_T1 / 8192.0
 
         # Pressure calibration
         self.dig_P1 = calib[7] << 8 | calib[6]
@@ -191,7 +220,7 @@ class BM280_SPI:
 
         # Humidity calibration (only for humidity-capable variant)
         if self.has_humidity:
-            self.dig_H1 = self._read_register(0xA1)
+            self.dig_H1 = calib[25]
             calib2 = self._read_registers(0xE1, 7)
             self.dig_H2 = self._to_signed(calib2[1] << 8 | calib2[0], 16)
             self.dig_H3 = calib2[2]
@@ -262,11 +291,13 @@ class BM280_SPI:
         if timeout_ms is None:
             timeout_ms = I2C_STATUS_CHECK_TIMEOUT_MS
 
+        # Poll the status register in short steps: a conversion finishes in
+        # a few ms, so a coarse sleep would mostly be dead time
         start_time = time.ticks_ms()
         while time.ticks_diff(time.ticks_ms(), start_time) < timeout_ms:
             if self.is_ready():
                 return True
-            time.sleep(0.01)
+            time.sleep_ms(2)
 
         return False
 
@@ -277,30 +308,33 @@ class BM280_SPI:
             raise OSError("BM280 sensor not ready - timeout waiting for data")
 
         # Read pressure, temperature, and humidity data (humidity only on BM280)
-        data_len = 8 if self.has_humidity else 6
-        data = self._read_registers(0xF7, data_len)
+        # in one burst into the pre-allocated buffer; data starts at index 1
+        data = self._data_rx
+        self._read_registers_into(0xF7, self._data_tx, data)
 
-        raw_press = (data[0] << 12) | (data[1] << 4) | (data[2] >> 4)
-        raw_temp = (data[3] << 12) | (data[4] << 4) | (data[5] >> 4)
+        raw_press = (data[1] << 12) | (data[2] << 4) | (data[3] >> 4)
+        raw_temp = (data[4] << 12) | (data[5] << 4) | (data[6] >> 4)
 
         # BM280 doesn't have humidity registers
         if self.has_humidity:
-            raw_hum = (data[6] << 8) | data[7]
+            raw_hum = (data[7] << 8) | data[8]
         else:
             raw_hum = 0
 
         return raw_temp, raw_press, raw_hum
 
+    @micropython.native
     def read_compensated_data(self):
         """Read and compensate sensor data"""
         raw_temp, raw_press, raw_hum = self.read_raw_data()
 
         # Compensate temperature
-        var1 = (raw_temp / 16384.0 - self.dig_T1 / 1024.0) * self.dig_T2
-        var2 = ((raw_temp / 131072.0 - self.dig_T1 / 8192.0) *
-                (raw_temp / 131072.0 - self.dig_T1 / 8192.0)) * self.dig_T3
-        t_fine = int(var1 + var2)
-        temperature = (var1 + var2) / 5120.0
+        var1 = (raw_temp / 16384.0 - self._t1_1024) * self.dig_T2
+        var2 = raw_temp / 131072.0 - self._t1_8192
+        var2 = var2 * var2 * self.dig_T3
+        t = var1 + var2
+        t_fine = int(t)
+        temperature = t / 5120.0
 
         # Compensate pressure
         var1 = (t_fine / 2.0) - 64000.0
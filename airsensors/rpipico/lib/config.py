@@ -1,31 +1,39 @@
 """
 Configuration constants for Raspberry Pi Pico sensor monitoring
 Centralized configuration for I2C pins, sensor addresses, and calibration values
+
+Integer values are wrapped in const() so the MicroPython compiler can fold
+them; floats cannot be const() and stay plain module attributes.
 """
 
+from micropython import const
+
 # SPI Configuration (BM280 on SPI)
 # Using SPI0 bus with pins as per GY-BM280 sensor wiring
 # RP2040 SPI0: MOSI=GP19, MISO=GP16, SCK=GP18, CS=GP17
-SPI_BUS = 0
-SPI_SCK_PIN = 18   # GP18 (Physical Pin 24) - SCL/SCK
-SPI_MOSI_PIN = 19  # GP19 (Physical Pin 25) - SDA/MOSI
-SPI_MISO_PIN = 16  # GP16 (Physical Pin 21) - SDO/MISO
-SPI_CS_PIN = 17    # GP17 (Physical Pin 22) - CSB/CS
-SPI_FREQ = 500000  # 500kHz for extra SPI stability margin
-SPI_POLARITY = 0   # BM280 SPI Mode 0 (CPOL=0)
-SPI_PHASE = 0      # BM280 SPI Mode 0 (CPHA=0)
+SPI_BUS = const(0)
+SPI_SCK_PIN = const(18)   # GP18 (Physical Pin 24) - SCL/SCK
+SPI_MOSI_PIN = const(19)  # GP19 (Physical Pin 25) - SDA/MOSI
+SPI_MISO_PIN = const(16)  # GP16 (Physical Pin 21) - SDO/MISO
+SPI_CS_PIN = const(17)    # GP17 (Physical Pin 22) - CSB/CS
+SPI_FREQ = const(500000)  # 500kHz for extra SPI stability margin
+SPI_CS_GUARD_US = const(10)  # Settle time after CS low / before CS high (datasheet: ns)
+SPI_POLARITY = const(0)   # BM280 SPI Mode 0 (CPOL=0)
+SPI_PHASE = const(0)      # BM280 SPI Mode 0 (CPHA=0)
 
 # I2C Configuration — NOT USED (BM280 uses SPI, MQ135 uses ADC)
 # Kept for reference only; do not initialize to avoid locking GPIO 14/15
 
 # LED Configuration
-LED_PIN = 25  # GPIO 25 (onboard green LED on Pico)
-LED_BLINK_DURATION_MS = 100  # LED on duration in milliseconds
+LED_PIN = const(25)  # GPIO 25 (onboard green LED on Pico)
+LED_BLINK_DURATION_MS = const(100)  # LED on duration in milliseconds
+LED_BLINK_DURATION_S = LED_BLINK_DURATION_MS / 1000.0  # Same, in seconds for time.sleep
 
 # MQ135 Configuration
-MQ135_PIN = 28  # GPIO 28 (ADC2, Pin 34)
-MQ135_R_LOAD = 10000  # 10kΩ load resistor
+MQ135_PIN = const(28)  # GPIO 28 (ADC2, Pin 34)
+MQ135_R_LOAD = const(10000)  # 10kΩ load resistor
 MQ135_R_ZERO = 42304.5  # Calibrated resistance in clean air (adjust based on your sensor)
+MQ135_RAW_ONLY = False  # Emit only raw_adc per reading; the host derives voltage/ppm
 
 # MQ135 Gas Calculation Constants
 MQ135_CO2_A = 116.6020682
@@ -36,31 +44,31 @@ MQ135_ALCOHOL_A = 77.255
 MQ135_ALCOHOL_B = -3.18
 
 # MQ135 PPM Limits
-MQ135_CO2_MAX = 10000
-MQ135_NH3_MAX = 500
-MQ135_ALCOHOL_MAX = 1000
+MQ135_CO2_MAX = const(10000)
+MQ135_NH3_MAX = const(500)
+MQ135_ALCOHOL_MAX = const(1000)
 
 # Air Quality Thresholds (CO2 ppm)
-AQ_EXCELLENT = 400
-AQ_GOOD = 600
-AQ_FAIR = 1000
-AQ_POOR = 1500
-AQ_VERY_POOR = 2500
+AQ_EXCELLENT = const(400)
+AQ_GOOD = const(600)
+AQ_FAIR = const(1000)
+AQ_POOR = const(1500)
+AQ_VERY_POOR = const(2500)
 
 # Timing Configuration
 BOOT_DELAY_SEC = 2.0  # Delay after boot to ensure USB is ready
 BM280_RETRY_DELAY_SEC = 2.0  # Delay between BM280 retry attempts
 SENSOR_READ_INTERVAL_SEC = 5.0  # Interval between sensor readings
-GC_COLLECT_INTERVAL = 60  # Garbage collection every N iterations
-BM280_RESET_INTERVAL = 100  # Reset sensor every N readings (0 = disabled)
+BATCH_SIZE = const(1)  # Readings buffered per USB write (1 = write every reading)
+BM280_RESET_INTERVAL = const(100)  # Reset sensor every N readings (0 = disabled)
 
 # I2C Recovery Configuration
-I2C_RECOVERY_RETRIES = 3  # Number of retries for I2C operations
-I2C_OPERATION_TIMEOUT_MS = 100  # Timeout for I2C operations in milliseconds
-I2C_STATUS_CHECK_TIMEOUT_MS = 500  # Timeout for waiting for sensor status
+I2C_RECOVERY_RETRIES = const(3)  # Number of retries for I2C operations
+I2C_OPERATION_TIMEOUT_MS = const(100)  # Timeout for I2C operations in milliseconds
+I2C_STATUS_CHECK_TIMEOUT_MS = const(500)  # Timeout for waiting for sensor status
 
 # ADC Configuration
-ADC_MAX_VALUE = 65535
+ADC_MAX_VALUE = const(65535)
 VOLTAGE_REFERENCE = 3.3
 MIN_VOLTAGE_THRESHOLD = 0.01  # Minimum voltage threshold for resistance calculation
 
@@ -3,6 +3,7 @@ MQ135 Air Quality Sensor Library
 Library for reading air quality data from MQ135 sensor via ADC
 """
 
+import micropython
 from machine import Pin, ADC
 
 try:
@@ -44,6 +45,9 @@ except ImportError:
 # Float comparison epsilon
 EPSILON = 1e-6
 
+# Volts per ADC count, so read_voltage() multiplies instead of dividing
+ADC_SCALE = VOLTAGE_REFERENCE / ADC_MAX_VALUE
+
 class MQ135:
     def __init__(self, adc_pin, r_zero=None, r_load=None):
         """
@@ -77,10 +81,14 @@ class MQ135:
         self.r_load = r_load
         self.r_zero = r_zero
         
+    def read_raw_u16(self):
+        """Read the raw 16-bit ADC value, skipping all conversion math"""
+        return self.adc.read_u16()
+    
     def read_voltage(self):
         """Read voltage from ADC"""
         raw = self.adc.read_u16()
-        voltage = (raw / ADC_MAX_VALUE) * VOLTAGE_REFERENCE
+        voltage = raw * ADC_SCALE
         return voltage, raw
     
     def read_resistance(self):
@@ -136,15 +144,41 @@ class MQ135:
         else:
             return 'Hazardous', 6
     
-    def get_all_readings(self):
-        """Get all sensor readings as a dictionary"""
-        ratio, resistance, voltage, raw = self.read_ratio()
+    @micropython.native
+    def read_values(self):
+        """
+        Get all sensor readings as an unrounded tuple, for callers that
+        format their own output instead of building a dictionary
+        
+        Returns:
+            tuple: (raw, voltage, resistance, ratio, co2_ppm, nh3_ppm,
+                    alcohol_ppm, air_quality_status, air_quality_index)
+        """
+        # Same math as read_ratio(), inlined so the native code path skips
+        # three nested method calls and their intermediate tuples
+        raw = self.adc.read_u16()
+        voltage = raw * ADC_SCALE
+        if voltage < MIN_VOLTAGE_THRESHOLD + EPSILON:
+            resistance = float('inf')
+            ratio = 0
+        else:
+            resistance = ((VOLTAGE_REFERENCE - voltage) / voltage) * self.r_load
+            ratio = 0 if abs(self.r_zero) < EPSILON else resistance / self.r_zero
         
         co2_ppm = self._calculate_co2_ppm(ratio)
-        nh3_ppm = self._calculate_nh3_ppm(ratio)
-        alcohol_ppm = self._calculate_alcohol_ppm(ratio)
         status, aqi = self.get_air_quality_status(co2_ppm)
         
+        return (
+            raw, voltage, resistance, ratio, co2_ppm,
+            self._calculate_nh3_ppm(ratio), self._calculate_alcohol_ppm(ratio),
+            status, aqi
+        )
+    
+    def get_all_readings(self):
+        """Get all sensor readings as a dictionary"""
+        (raw, voltage, resistance, ratio, co2_ppm,
+         nh3_ppm, alcohol_ppm, status, aqi) = self.read_values()
+        
         return {
             'raw_adc': raw,
             'voltage_v': round(voltage, 3),
@@ -4,10 +4,13 @@ This file runs automatically when the Pico boots up
 Outputs BM280 (SPI) + MQ135 sensor data in JSON format every second over USB
 """
 
+import gc
 import json
+import sys
 import time
-import machine
-from machine import Pin, SPI, ADC
+import micropython
+from machine import Pin, SPI
+from micropython import const
 
 # Import sensor libraries and configuration
 try:
@@ -25,13 +28,14 @@ try:
         MQ135_PIN,
         MQ135_R_ZERO,
         MQ135_R_LOAD,
+        MQ135_RAW_ONLY,
         BOOT_DELAY_SEC,
         BM280_RETRY_DELAY_SEC,
         SENSOR_READ_INTERVAL_SEC,
-        GC_COLLECT_INTERVAL,
+        BATCH_SIZE,
         I2C_RECOVERY_RETRIES,
         LED_PIN,
-        LED_BLINK_DURATION_MS,
+        LED_BLINK_DURATION_S,
     )
 except ImportError as e:
     # Library modules are required - fail fast with clear error
@@ -43,20 +47,105 @@ except ImportError as e:
     print(json.dumps(error_msg))
     raise
 
+# Reserve a buffer so exceptions raised while the heap is exhausted or
+# fragmented can still be created and reported
+micropython.alloc_emergency_exception_buf(128)
+
 
 # BM280 reliability tuning
-BM280_STARTUP_RETRIES = 10
+BM280_STARTUP_RETRIES = const(10)
 BM280_RUNTIME_RETRY_INTERVAL_SEC = 10.0
-BM280_RUNTIME_INIT_RETRIES = 2
+BM280_RUNTIME_INIT_RETRIES = const(2)
 BM280_RUNTIME_RETRY_DELAY_SEC = 0.5
 BM280_MAX_BACKOFF_SEC = 5.0
 
+# SPI reinit backoff ladder (0.1 s doubling), indexed by attempt; the last
+# entry is reused if max_retries exceeds the table
+_SPI_BACKOFF_SEC = (0.1, 0.2, 0.4, 0.8, 1.6, 3.2, 6.4)
+
+
+# Reading lines are filled into fixed templates rather than built as dicts and
+# passed through json.dumps; numeric fields arrive pre-formatted by fmt1/2/3
+# Static values (MQ135 r_zero) are reported once in the init status message
+# rather than repeated in every line
+_READING_HEAD = '{"timestamp_ms":%d,"timestamp_since_boot_ms":%d'
+_READING_BM280 = (
+    ',"bm280":{"temperature_c":%s,"humidity_percent":%s,'
+    '"pressure_hpa":%s,"pressure_pa":%d}'
+)
+_READING_MQ135 = (
+    ',"mq135":{"raw_adc":%d,"voltage_v":%s,"resistance_ohm":%s,"ratio_rs_r0":%s,'
+    '"co2_ppm":%s,"nh3_ppm":%s,"alcohol_ppm":%s,"air_quality_status":"%s",'
+    '"air_quality_index":%d}'
+)
+if MQ135_RAW_ONLY:
+    # Raw-only mode: voltage, resistance and ppm are computed on the host
+    _READING_MQ135 = ',"mq135":{"raw_adc":%d}'
+READING_BOTH_FMT = _READING_HEAD + _READING_BM280 + _READING_MQ135 + "}\n"
+READING_BM280_FMT = _READING_HEAD + _READING_BM280 + "}\n"
+READING_MQ135_FMT = _READING_HEAD + _READING_MQ135 + "}\n"
+READING_NONE_FMT = _READING_HEAD + "}\n"
+
+# Complete JSON lines for the per-iteration sensor read errors; only the
+# timestamp and the JSON-encoded details string are filled in
+BM280_READ_ERROR_FMT = (
+    '{"timestamp_ms":%d,"status":"error","sensor":"bm280",'
+    '"error":"BM280 read error","details":%s,"attempting_recovery":true}\n'
+)
+MQ135_READ_ERROR_FMT = (
+    '{"timestamp_ms":%d,"status":"error","sensor":"mq135",'
+    '"error":"MQ135 read error","details":%s}\n'
+)
+UNEXPECTED_ERROR_FMT = (
+    '{"timestamp_ms":%d,"status":"error","error":"Unexpected error",'
+    '"details":%s,"type":"%s"}\n'
+)
+
+_INF = float("inf")
+
+# _read_and_emit() status bits; the two OK bits double as the LED blink count
+READ_BM280_OK = const(1)
+READ_MQ135_OK = const(2)
+READ_BM280_FAILED = const(4)
+
+
+def fmt2(value):
+    """Format a float with 2 decimals using integer math (no float printing)"""
+    i = int(value * 100 + (0.5 if value >= 0 else -0.5))
+    if i < 0:
+        return "-%d.%02d" % (-i // 100, -i % 100)
+    return "%d.%02d" % (i // 100, i % 100)
+
+
+def fmt1(value):
+    """Format a float with 1 decimal using integer math (no float printing)"""
+    i = int(value * 10 + (0.5 if value >= 0 else -0.5))
+    if i < 0:
+        return "-%d.%d" % (-i // 10, -i % 10)
+    return "%d.%d" % (i // 10, i % 10)
+
+
+def fmt3(value):
+    """Format a float with 3 decimals using integer math (no float printing)"""
+    i = int(value * 1000 + (0.5 if value >= 0 else -0.5))
+    if i < 0:
+        return "-%d.%03d" % (-i // 1000, -i % 1000)
+    return "%d.%03d" % (i // 1000, i % 1000)
+
+
+def _emit(obj):
+    """Write obj to USB serial as a JSON line, streaming instead of building a string"""
+    json.dump(obj, sys.stdout)
+    sys.stdout.write("\n")
+
 
 # SPI and sensor recovery functions
-def reinitialize_spi(old_spi=None, max_retries=None):
+def reinitialize_spi(old_spi=None, max_retries=None, old_cs_pin=None):
     """
     Reinitialize the SPI bus with exponential backoff retry logic.
-    Deinits old_spi before creating the new bus to release RP2040 SPI peripheral resources.
+    Deinits old_spi and then re-inits that same object in place, so sensor
+    objects holding a reference to it keep working; a new SPI object is only
+    created when there is no old bus. old_cs_pin is likewise reused.
     Returns: (SPI object, CS pin object) or (None, None) if failed
     """
     if max_retries is None:
@@ -70,33 +159,47 @@ def reinitialize_spi(old_spi=None, max_retries=None):
 
     for attempt in range(max_retries):
         try:
-            # Try to create a new SPI bus with proper BM280 mode (SPI Mode 0)
-            spi = SPI(
-                SPI_BUS,
-                baudrate=SPI_FREQ,
-                polarity=SPI_POLARITY,
-                phase=SPI_PHASE,
-                sck=Pin(SPI_SCK_PIN),
-                mosi=Pin(SPI_MOSI_PIN),
-                miso=Pin(SPI_MISO_PIN),
-            )
-            cs_pin = Pin(SPI_CS_PIN, Pin.OUT)
+            # Bring the SPI bus back up with proper BM280 mode (SPI Mode 0)
+            if old_spi is not None:
+                old_spi.init(
+                    baudrate=SPI_FREQ,
+                    polarity=SPI_POLARITY,
+                    phase=SPI_PHASE,
+                    sck=Pin(SPI_SCK_PIN),
+                    mosi=Pin(SPI_MOSI_PIN),
+                    miso=Pin(SPI_MISO_PIN),
+                )
+                spi = old_spi
+            else:
+                spi = SPI(
+                    SPI_BUS,
+                    baudrate=SPI_FREQ,
+                    polarity=SPI_POLARITY,
+                    phase=SPI_PHASE,
+                    sck=Pin(SPI_SCK_PIN),
+                    mosi=Pin(SPI_MOSI_PIN),
+                    miso=Pin(SPI_MISO_PIN),
+                )
+            if old_cs_pin is not None:
+                old_cs_pin.init(Pin.OUT)
+                cs_pin = old_cs_pin
+            else:
+                cs_pin = Pin(SPI_CS_PIN, Pin.OUT)
             cs_pin.on()  # Deselect initially
             return spi, cs_pin
         except Exception as e:
             if attempt < max_retries - 1:
                 # Exponential backoff: 2^attempt * 0.1 seconds
-                delay = (2**attempt) * 0.1
-                time.sleep(delay)
+                time.sleep(_SPI_BACKOFF_SEC[min(attempt, len(_SPI_BACKOFF_SEC) - 1)])
             else:
                 error_msg = {
-                    "timestamp": time.ticks_ms() / 1000.0,
+                    "timestamp_ms": time.ticks_ms(),
                     "status": "error",
                     "error": "SPI reinitialization failed",
                     "details": str(e),
                     "attempts": max_retries,
                 }
-                print(json.dumps(error_msg))
+                _emit(error_msg)
 
     return None, None
 
@@ -122,6 +225,7 @@ def initialize_bm280_spi(
         return None, spi, cs_pin
 
     last_error = None
+    delay = retry_delay_sec  # Doubled after each failed attempt, up to the cap
 
     for attempt in range(max_retries):
         try:
@@ -132,7 +236,7 @@ def initialize_bm280_spi(
             is_last_attempt = attempt >= max_retries - 1
 
             retry_msg = {
-                "timestamp": time.ticks_ms() / 1000.0,
+                "timestamp_ms": time.ticks_ms(),
                 "status": "bm280_retry",
                 "context": context,
                 "attempt": attempt + 1,
@@ -140,37 +244,39 @@ def initialize_bm280_spi(
                 "error": str(e),
                 "error_type": type(e).__name__,
             }
-            print(json.dumps(retry_msg))
+            _emit(retry_msg)
 
             if is_last_attempt:
                 break
 
             if reinitialize_bus_on_retry:
                 new_spi, new_cs_pin = reinitialize_spi(
-                    old_spi=spi, max_retries=I2C_RECOVERY_RETRIES
+                    old_spi=spi, max_retries=I2C_RECOVERY_RETRIES, old_cs_pin=cs_pin
                 )
                 if new_spi is not None and new_cs_pin is not None:
                     spi = new_spi
                     cs_pin = new_cs_pin
 
-            delay = min((2**attempt) * retry_delay_sec, BM280_MAX_BACKOFF_SEC)
             time.sleep(delay)
+            if delay < BM280_MAX_BACKOFF_SEC:
+                delay = min(delay * 2, BM280_MAX_BACKOFF_SEC)
 
     error_msg = {
-        "timestamp": time.ticks_ms() / 1000.0,
+        "timestamp_ms": time.ticks_ms(),
         "status": "error",
         "error": "BM280 initialization failed",
         "context": context,
         "details": str(last_error) if last_error is not None else "unknown",
         "attempts": max_retries,
     }
-    print(json.dumps(error_msg))
+    _emit(error_msg)
     return None, spi, cs_pin
 
 
 def recover_bm280_spi(spi, cs_pin, current_bm280=None, max_retries=None):
     """
     Attempt to recover BM280 sensor via SPI
+    Runs inside the monitoring loop, so retries use the short runtime backoff.
     Returns: BM280_SPI object or None if recovery failed
     """
     if max_retries is None:
@@ -189,12 +295,12 @@ def recover_bm280_spi(spi, cs_pin, current_bm280=None, max_retries=None):
             # Verify sensor is responding
             _ = current_bm280.check_status()
             recovery_msg = {
-                "timestamp": time.ticks_ms() / 1000.0,
+                "timestamp_ms": time.ticks_ms(),
                 "status": "recovered",
                 "sensor": "bm280",
                 "method": "reset",
             }
-            print(json.dumps(recovery_msg))
+            _emit(recovery_msg)
             return current_bm280
         except Exception:
             pass  # Reset failed, try reinitializing
@@ -204,81 +310,353 @@ def recover_bm280_spi(spi, cs_pin, current_bm280=None, max_retries=None):
         spi,
         cs_pin,
         max_retries=max_retries,
-        retry_delay_sec=BM280_RETRY_DELAY_SEC,
+        retry_delay_sec=BM280_RUNTIME_RETRY_DELAY_SEC,
         reinitialize_bus_on_retry=False,
         context="recovery",
     )
 
     if recovered_sensor is not None:
         recovery_msg = {
-            "timestamp": time.ticks_ms() / 1000.0,
+            "timestamp_ms": time.ticks_ms(),
             "status": "recovered",
             "sensor": "bm280",
             "method": "reinitialize",
         }
-        print(json.dumps(recovery_msg))
+        _emit(recovery_msg)
 
     return recovered_sensor
 
 
-def blink_led(led_pin, duration_ms=LED_BLINK_DURATION_MS):
+# LED pause timings in seconds, precomputed so blinks do no float division
+LED_PAUSE_S = 0.15
+LED_ERROR_BLINK_S = 0.2
+
+
+def blink_led(led_pin, duration_s=LED_BLINK_DURATION_S):
     """
-    Single blink of the LED for a specified duration
+    Single blink of the LED for a specified duration in seconds
     """
     try:
         led_pin.on()
-        time.sleep(duration_ms / 1000.0)
+        time.sleep(duration_s)
         led_pin.off()
     except Exception:
         pass  # Silently fail if LED operation fails
 
 
-def blink_pattern(led_pin, count, duration_ms=LED_BLINK_DURATION_MS, pause_ms=150):
+def blink_pattern(led_pin, count):
     """
     Blink the LED multiple times with pauses between blinks
     count: number of blinks (1=BM280 only, 2=MQ135 only, 3=both sensors)
     """
     if led_pin is None:
         return
+    s = LED_BLINK_DURATION_S
+    p = LED_PAUSE_S
+    sleep = time.sleep
+    on = led_pin.on
+    off = led_pin.off
     try:
-        for i in range(count):
-            led_pin.on()
-            time.sleep(duration_ms / 1000.0)
-            led_pin.off()
-            if i < count - 1:  # Pause between blinks, not after last
-                time.sleep(pause_ms / 1000.0)
+        n = count
+        while n:
+            on()
+            sleep(s)
+            off()
+            n -= 1
+            if n:  # Pause between blinks, not after last
+                sleep(p)
     except Exception:
         pass  # Silently fail if LED operation fails
 
 
-def blink_error(led_pin, duration_ms=200):
+def blink_error(led_pin):
     """
     Slow continuous blinks (error state)
     """
     if led_pin is None:
         return
+    s = LED_ERROR_BLINK_S
+    sleep = time.sleep
+    on = led_pin.on
+    off = led_pin.off
     try:
-        for _ in range(3):  # 3 slow blinks
-            led_pin.on()
-            time.sleep(duration_ms / 1000.0)
-            led_pin.off()
-            time.sleep(duration_ms / 1000.0)
+        n = 3  # 3 slow blinks
+        while n:
+            on()
+            sleep(s)
+            off()
+            sleep(s)
+            n -= 1
     except Exception:
         pass  # Silently fail if LED operation fails
 
 
+@micropython.native
+def _read_and_emit(read_bm280, read_mq135, timestamp_ms, boot_ms, batch):
+    """
+    Read the available sensors once and append the JSON reading line to batch.
+    read_bm280/read_mq135 are the sensors' bound read methods, or None when
+    the sensor is unavailable.
+    Read errors are written immediately; recovery is left to the caller.
+    Returns a mask of READ_BM280_OK, READ_MQ135_OK and READ_BM280_FAILED.
+    """
+    status = 0
+    bm280_fields = None
+    mq135_fields = None
+
+    if read_bm280 is not None:
+        try:
+            temp_c, pressure_pa, humidity_pct = read_bm280()
+            bm280_fields = (
+                fmt2(temp_c),
+                fmt1(humidity_pct),
+                fmt1(pressure_pa / 100.0),
+                int(pressure_pa + 0.5),
+            )
+            status |= READ_BM280_OK
+        except Exception as e:
+            sys.stdout.write(BM280_READ_ERROR_FMT % (timestamp_ms, json.dumps(str(e))))
+            status |= READ_BM280_FAILED
+
+    if read_mq135 is not None and MQ135_RAW_ONLY:
+        try:
+            mq135_fields = (read_mq135(),)
+            status |= READ_MQ135_OK
+        except Exception as e:
+            sys.stdout.write(MQ135_READ_ERROR_FMT % (timestamp_ms, json.dumps(str(e))))
+    elif read_mq135 is not None:
+        try:
+            (raw, voltage, resistance, ratio, co2_ppm, nh3_ppm,
+             alcohol_ppm, aq_status, aqi) = read_mq135()
+            mq135_fields = (
+                raw,
+                fmt3(voltage),
+                # Open circuit yields inf, which has no JSON encoding
+                fmt1(resistance) if resistance < _INF else "null",
+                fmt3(ratio),
+                fmt1(co2_ppm),
+                fmt1(nh3_ppm),
+                fmt1(alcohol_ppm),
+                aq_status,
+                aqi,
+            )
+            status |= READ_MQ135_OK
+        except Exception as e:
+            sys.stdout.write(MQ135_READ_ERROR_FMT % (timestamp_ms, json.dumps(str(e))))
+
+    # Fill the JSON reading line template matching the sensors that read OK
+    head = (timestamp_ms, time.ticks_diff(timestamp_ms, boot_ms))
+    if bm280_fields is not None and mq135_fields is not None:
+        line = READING_BOTH_FMT % (head + bm280_fields + mq135_fields)
+    elif bm280_fields is not None:
+        line = READING_BM280_FMT % (head + bm280_fields)
+    elif mq135_fields is not None:
+        line = READING_MQ135_FMT % (head + mq135_fields)
+    else:
+        line = READING_NONE_FMT % head
+
+    # str exposes the buffer protocol on MicroPython, so no encode needed
+    batch.extend(line)
+    return status
+
+
+@micropython.native
+def _run_loop(bm280, mq135, spi, cs_pin, led, boot_ms, batch_size):
+    """
+    Continuous read/emit loop, compiled to machine code by the native emitter.
+    Readings are buffered and written to USB once every batch_size iterations;
+    garbage collection is left to the gc.threshold() set by the caller.
+    Returns only when monitoring is stopped with Ctrl+C.
+    """
+    batch = bytearray()
+    batch_count = 0
+    bm280_read_count = 0  # Counter for periodic reset
+    bm280_retry_interval_ms = int(BM280_RUNTIME_RETRY_INTERVAL_SEC * 1000)
+    last_bm280_init_attempt_ms = time.ticks_ms()
+
+    # Hot-loop names bound as locals: a local load replaces a global dict
+    # lookup plus attribute lookup on every use
+    ticks_ms = time.ticks_ms
+    ticks_diff = time.ticks_diff
+    ticks_add = time.ticks_add
+    sleep_ms = time.sleep_ms
+    write = sys.stdout.write
+    # Sensor read methods bound once; read_bm280 is rebound whenever recovery
+    # replaces or drops the bm280 object
+    read_bm280 = bm280.read_compensated_data if bm280 is not None else None
+    if mq135 is None:
+        read_mq135 = None
+    elif MQ135_RAW_ONLY:
+        read_mq135 = mq135.read_raw_u16
+    else:
+        read_mq135 = mq135.read_values
+    # Pace in integer ms so the loop handles no float seconds
+    interval_ms = int(SENSOR_READ_INTERVAL_SEC * 1000)
+
+    while True:
+        try:
+            # Integer device ticks; the host converts to seconds if it needs them
+            timestamp_ms = ticks_ms()
+
+            # If BM280 is currently unavailable, retry initialization periodically.
+            if bm280 is None:
+                now_ms = ticks_ms()
+                if (
+                    ticks_diff(now_ms, last_bm280_init_attempt_ms)
+                    >= bm280_retry_interval_ms
+                ):
+                    last_bm280_init_attempt_ms = now_ms
+                    reconnect_msg = {
+                        "timestamp_ms": timestamp_ms,
+                        "status": "bm280_reconnect_attempt",
+                        "message": "Attempting to reinitialize BM280",
+                    }
+                    _emit(reconnect_msg)
+
+                    if spi is None or cs_pin is None:
+                        spi, cs_pin = reinitialize_spi(old_spi=spi, old_cs_pin=cs_pin)
+
+                    if spi is not None and cs_pin is not None:
+                        recovered_bm280, spi, cs_pin = initialize_bm280_spi(
+                            spi,
+                            cs_pin,
+                            max_retries=BM280_RUNTIME_INIT_RETRIES,
+                            retry_delay_sec=BM280_RUNTIME_RETRY_DELAY_SEC,
+                            reinitialize_bus_on_retry=True,
+                            context="runtime_reconnect",
+                        )
+                        if recovered_bm280 is not None:
+                            bm280 = recovered_bm280
+                            read_bm280 = bm280.read_compensated_data
+                            recovered_msg = {
+                                "timestamp_ms": timestamp_ms,
+                                "status": "recovered",
+                                "sensor": "bm280",
+                                "method": "runtime_reconnect",
+                            }
+                            _emit(recovered_msg)
+
+            status = _read_and_emit(
+                read_bm280, read_mq135, timestamp_ms, boot_ms, batch
+            )
+            if status & READ_BM280_OK:
+                bm280_read_count += 1
+
+            if status & READ_BM280_FAILED:
+                # Attempt recovery: first try reset, then reinitialize bus if needed
+                recovery_successful = False
+
+                # Step 1: Try to reset sensor
+                try:
+                    if bm280 is not None:
+                        bm280.reset()
+                        # CRITICAL: reset() returns BM280 to sleep mode — must
+                        # reconfigure to restore normal mode before reads will work.
+                        bm280.reconfigure()
+                        # Verify sensor responds
+                        _ = bm280.check_status()
+                        recovery_successful = True
+                        recovery_msg = {
+                            "timestamp_ms": timestamp_ms,
+                            "status": "recovered",
+                            "sensor": "bm280",
+                            "method": "reset",
+                        }
+                        _emit(recovery_msg)
+                except Exception:
+                    pass  # Reset failed, try bus recovery
+
+                # Step 2: If reset failed, try reinitializing SPI bus
+                if not recovery_successful:
+                    new_spi, new_cs_pin = reinitialize_spi(
+                        old_spi=spi, old_cs_pin=cs_pin
+                    )
+                    if new_spi is not None and new_cs_pin is not None:
+                        spi = new_spi
+                        cs_pin = new_cs_pin
+                        # Step 3: Try to recover BM280 with new bus
+                        recovered_bm280 = recover_bm280_spi(
+                            spi, cs_pin, current_bm280=bm280
+                        )
+                        if recovered_bm280 is not None:
+                            bm280 = recovered_bm280
+                            read_bm280 = bm280.read_compensated_data
+                            recovery_successful = True
+
+                if not recovery_successful:
+                    bm280 = None  # Mark missing so periodic reconnect can restore it
+                    read_bm280 = None
+                    last_bm280_init_attempt_ms = ticks_add(
+                        ticks_ms(), -bm280_retry_interval_ms
+                    )
+                    # Recovery failed - sensor unavailable for this cycle
+                    unavailable_msg = {
+                        "timestamp_ms": timestamp_ms,
+                        "status": "warning",
+                        "sensor": "bm280",
+                        "message": "BM280 unavailable after recovery attempts",
+                    }
+                    _emit(unavailable_msg)
+
+            # Output JSON to USB serial, one write per batch of readings
+            batch_count += 1
+            if batch_count >= batch_size:
+                write(batch)
+                batch[:] = b""
+                batch_count = 0
+
+            # Blink LED pattern based on which sensors read successfully
+            # 1 blink = BM280 only, 2 blinks = MQ135 only, 3 blinks = both;
+            # the READ_*_OK bits (1, 2) are chosen so the mask is the count
+            if led is not None:
+                blinks = status & (READ_BM280_OK | READ_MQ135_OK)
+                if blinks:
+                    blink_pattern(led, blinks)
+                else:
+                    blink_error(led)  # Neither sensor read OK
+
+            # Wait for next reading (from config). The interval is measured
+            # from the start of this cycle, so time spent reading, recovering
+            # and blinking the LED overlaps the wait instead of adding to it
+            remaining_ms = ticks_diff(ticks_add(timestamp_ms, interval_ms), ticks_ms())
+            if remaining_ms > 0:
+                sleep_ms(remaining_ms)
+
+        except KeyboardInterrupt:
+            if batch_count:
+                write(batch)
+            stop_msg = {
+                "timestamp_ms": ticks_ms(),
+                "status": "stopped",
+                "message": "Monitoring stopped by user",
+            }
+            _emit(stop_msg)
+            return
+        except Exception as e:
+            # Other unexpected errors - always output as JSON
+            write(
+                UNEXPECTED_ERROR_FMT
+                % (ticks_ms(), json.dumps(str(e)), type(e).__name__)
+            )
+            sleep_ms(interval_ms)
+
+
 # Auto-start monitoring function
 def auto_start_monitoring():
     """Auto-start monitoring on boot"""
-    boot_timestamp = time.ticks_ms() / 1000.0
+    boot_ms = time.ticks_ms()
+
+    # Prime the JSON module once so its lazily initialized state is ready
+    # before the first real message and every later serialize in the loop
+    json.dumps(None)
 
     # Output startup message as JSON for consistency
     startup_msg = {
-        "timestamp": boot_timestamp,
+        "timestamp_ms": boot_ms,
         "status": "starting",
         "message": "Auto-starting JSON sensor monitoring...",
     }
-    print(json.dumps(startup_msg))
+    _emit(startup_msg)
 
     # Delay to ensure USB is ready (from config)
     time.sleep(BOOT_DELAY_SEC)
@@ -297,35 +675,34 @@ def auto_start_monitoring():
             led_identifier = str(LED_PIN)
         except Exception as e:
             led_error_msg = {
-                "timestamp": time.ticks_ms() / 1000.0,
+                "timestamp_ms": time.ticks_ms(),
                 "status": "warning",
                 "message": "LED initialization failed",
                 "details": str(e),
             }
-            print(json.dumps(led_error_msg))
+            _emit(led_error_msg)
 
     if led is not None:
         try:
             led.off()
             led_msg = {
-                "timestamp": time.ticks_ms() / 1000.0,
+                "timestamp_ms": time.ticks_ms(),
                 "status": "led_initialized",
                 "pin": led_identifier,
             }
-            print(json.dumps(led_msg))
+            _emit(led_msg)
         except Exception as e:
             led_error_msg = {
-                "timestamp": time.ticks_ms() / 1000.0,
+                "timestamp_ms": time.ticks_ms(),
                 "status": "warning",
                 "message": "LED initialization failed",
                 "details": str(e),
             }
-            print(json.dumps(led_error_msg))
+            _emit(led_error_msg)
 
     # I2C bus not used in current configuration (BM280 uses SPI, MQ135 uses ADC).
     # Skip I2C initialization to avoid locking the bus.
     # If future sensors need I2C, initialize here.
-    i2c = None
 
     # Initialize SPI bus for GY-BM280
     spi = None
@@ -344,7 +721,7 @@ def auto_start_monitoring():
         cs_pin = Pin(SPI_CS_PIN, Pin.OUT)
         cs_pin.on()  # Deselect initially
         spi_msg = {
-            "timestamp": time.ticks_ms() / 1000.0,
+            "timestamp_ms": time.ticks_ms(),
             "status": "spi_initialized",
             "bus": SPI_BUS,
             "sck_pin": SPI_SCK_PIN,
@@ -353,15 +730,15 @@ def auto_start_monitoring():
             "cs_pin": SPI_CS_PIN,
             "frequency": SPI_FREQ,
         }
-        print(json.dumps(spi_msg))
+        _emit(spi_msg)
     except Exception as e:
         error_msg = {
-            "timestamp": time.ticks_ms() / 1000.0,
+            "timestamp_ms": time.ticks_ms(),
             "status": "error",
             "error": "SPI bus initialization failed",
             "details": str(e),
         }
-        print(json.dumps(error_msg))
+        _emit(error_msg)
 
     # Initialize sensors independently
     bm280 = None
@@ -380,51 +757,52 @@ def auto_start_monitoring():
 
         if bm280 is None:
             warning_msg = {
-                "timestamp": time.ticks_ms() / 1000.0,
+                "timestamp_ms": time.ticks_ms(),
                 "status": "warning",
                 "message": "BM280 unavailable - will send MQ135 data only",
             }
-            print(json.dumps(warning_msg))
+            _emit(warning_msg)
         else:
             bm280_msg = {
-                "timestamp": time.ticks_ms() / 1000.0,
+                "timestamp_ms": time.ticks_ms(),
                 "status": "bm280_initialized",
                 "interface": "SPI",
             }
-            print(json.dumps(bm280_msg))
+            _emit(bm280_msg)
 
     # Try to initialize MQ135 (critical sensor for air quality)
     try:
         mq135 = MQ135(MQ135_PIN, r_zero=MQ135_R_ZERO, r_load=MQ135_R_LOAD)
         mq135_msg = {
-            "timestamp": time.ticks_ms() / 1000.0,
+            "timestamp_ms": time.ticks_ms(),
             "status": "mq135_initialized",
             "pin": MQ135_PIN,
             "r_zero": MQ135_R_ZERO,
             "r_load": MQ135_R_LOAD,
+            "raw_only": MQ135_RAW_ONLY,
         }
-        print(json.dumps(mq135_msg))
+        _emit(mq135_msg)
     except Exception as e:
         error_msg = {
-            "timestamp": time.ticks_ms() / 1000.0,
+            "timestamp_ms": time.ticks_ms(),
             "status": "error",
             "error": "MQ135 initialization failed",
             "pin": MQ135_PIN,
             "details": str(e),
             "message": f"Check wiring on GPIO {MQ135_PIN}",
         }
-        print(json.dumps(error_msg))
+        _emit(error_msg)
         return
 
     # Require at least one sensor to be working
     if bm280 is None and mq135 is None:
         error_msg = {
-            "timestamp": time.ticks_ms() / 1000.0,
+            "timestamp_ms": time.ticks_ms(),
             "status": "error",
             "error": "No sensors available",
             "message": "Check all connections",
         }
-        print(json.dumps(error_msg))
+        _emit(error_msg)
         # Blink error pattern
         blink_error(led)
         return
@@ -434,235 +812,47 @@ def auto_start_monitoring():
     time.sleep(0.5)  # Pause before diagnostic
     if bm280 is not None and mq135 is not None:
         diagnostic_msg = {
-            "timestamp": time.ticks_ms() / 1000.0,
+            "timestamp_ms": time.ticks_ms(),
             "status": "diagnostic",
             "message": "Both sensors available (3 blinks)",
         }
-        print(json.dumps(diagnostic_msg))
+        _emit(diagnostic_msg)
         blink_pattern(led, 3)  # Both sensors
     elif bm280 is not None:
         diagnostic_msg = {
-            "timestamp": time.ticks_ms() / 1000.0,
+            "timestamp_ms": time.ticks_ms(),
             "status": "diagnostic",
             "message": "Only BM280 available (1 blink)",
         }
-        print(json.dumps(diagnostic_msg))
+        _emit(diagnostic_msg)
         blink_pattern(led, 1)  # BM280 only
     else:  # mq135 is not None
         diagnostic_msg = {
-            "timestamp": time.ticks_ms() / 1000.0,
+            "timestamp_ms": time.ticks_ms(),
             "status": "diagnostic",
             "message": "Only MQ135 available (2 blinks)",
         }
-        print(json.dumps(diagnostic_msg))
+        _emit(diagnostic_msg)
         blink_pattern(led, 2)  # MQ135 only
 
     # Start monitoring message
     start_msg = {
-        "timestamp": time.ticks_ms() / 1000.0,
+        "timestamp_ms": time.ticks_ms(),
         "status": "monitoring_started",
         "message": "Starting continuous JSON monitoring (auto-boot)",
         "bm280_available": bm280 is not None,
         "mq135_available": mq135 is not None,
         "note": "Press Ctrl+C to stop, or reset Pico to restart",
     }
-    print(json.dumps(start_msg))
-
-    # Start continuous monitoring loop
-    import gc
+    _emit(start_msg)
 
+    # Start continuous monitoring loop. Once the init garbage is collected,
+    # let the runtime collect after every quarter of the free heap is
+    # allocated, keeping each GC pass short instead of one long pause when
+    # the heap runs out
     gc.collect()
-    iteration_count = 0
-    bm280_read_count = 0  # Counter for periodic reset
-    bm280_retry_interval_ms = int(BM280_RUNTIME_RETRY_INTERVAL_SEC * 1000)
-    last_bm280_init_attempt_ms = time.ticks_ms()
-
-    while True:
-        try:
-            # Get current timestamp (relative to boot, with boot offset for reference)
-            timestamp = time.ticks_ms() / 1000.0
-            sensor_data = {
-                "timestamp": timestamp,
-                "timestamp_since_boot": timestamp - boot_timestamp,
-            }
-
-            # Track which sensors successfully read
-            bm280_read_ok = False
-            mq135_read_ok = False
-
-            # If BM280 is currently unavailable, retry initialization periodically.
-            if bm280 is None:
-                now_ms = time.ticks_ms()
-                if (
-                    time.ticks_diff(now_ms, last_bm280_init_attempt_ms)
-                    >= bm280_retry_interval_ms
-                ):
-                    last_bm280_init_attempt_ms = now_ms
-                    reconnect_msg = {
-                        "timestamp": timestamp,
-                        "status": "bm280_reconnect_attempt",
-                        "message": "Attempting to reinitialize BM280",
-                    }
-                    print(json.dumps(reconnect_msg))
-
-                    if spi is None or cs_pin is None:
-                        spi, cs_pin = reinitialize_spi(old_spi=spi)
-
-                    if spi is not None and cs_pin is not None:
-                        recovered_bm280, spi, cs_pin = initialize_bm280_spi(
-                            spi,
-                            cs_pin,
-                            max_retries=BM280_RUNTIME_INIT_RETRIES,
-                            retry_delay_sec=BM280_RUNTIME_RETRY_DELAY_SEC,
-                            reinitialize_bus_on_retry=True,
-                            context="runtime_reconnect",
-                        )
-                        if recovered_bm280 is not None:
-                            bm280 = recovered_bm280
-                            recovered_msg = {
-                                "timestamp": timestamp,
-                                "status": "recovered",
-                                "sensor": "bm280",
-                                "method": "runtime_reconnect",
-                            }
-                            print(json.dumps(recovered_msg))
-
-            # Read BM280 if available
-            if bm280 is not None:
-                try:
-                    # Read sensor data
-                    temp_c, pressure_pa, humidity_pct = bm280.read_compensated_data()
-                    pressure_hpa = pressure_pa / 100.0
-                    sensor_data["bm280"] = {
-                        "temperature_c": round(temp_c, 2),
-                        "humidity_percent": round(humidity_pct, 1),
-                        "pressure_hpa": round(pressure_hpa, 1),
-                        "pressure_pa": round(pressure_pa, 0),
-                    }
-                    bm280_read_count += 1
-                    bm280_read_ok = True
-                except Exception as e:
-                    # BM280 error - attempt recovery
-                    error_data = {
-                        "timestamp": timestamp,
-                        "status": "error",
-                        "sensor": "bm280",
-                        "error": "BM280 read error",
-                        "details": str(e),
-                        "attempting_recovery": True,
-                    }
-                    print(json.dumps(error_data))
-
-                    # Attempt recovery: first try reset, then reinitialize bus if needed
-                    recovery_successful = False
-
-                    # Step 1: Try to reset sensor
-                    try:
-                        if bm280 is not None:
-                            bm280.reset()
-                            # CRITICAL: reset() returns BM280 to sleep mode — must
-                            # reconfigure to restore normal mode before reads will work.
-                            bm280.reconfigure()
-                            # Verify sensor responds
-                            _ = bm280.check_status()
-                            recovery_successful = True
-                            recovery_msg = {
-                                "timestamp": timestamp,
-                                "status": "recovered",
-                                "sensor": "bm280",
-                                "method": "reset",
-                            }
-                            print(json.dumps(recovery_msg))
-                    except Exception:
-                        pass  # Reset failed, try bus recovery
-
-                    # Step 2: If reset failed, try reinitializing SPI bus
-                    if not recovery_successful:
-                        new_spi, new_cs_pin = reinitialize_spi(old_spi=spi)
-                        if new_spi is not None and new_cs_pin is not None:
-                            spi = new_spi
-                            cs_pin = new_cs_pin
-                            # Step 3: Try to recover BM280 with new bus
-                            recovered_bm280 = recover_bm280_spi(
-                                spi, cs_pin, current_bm280=bm280
-                            )
-                            if recovered_bm280 is not None:
-                                bm280 = recovered_bm280
-                                recovery_successful = True
-
-                    if not recovery_successful:
-                        bm280 = None  # Mark missing so periodic reconnect can restore it
-                        last_bm280_init_attempt_ms = time.ticks_add(
-                            time.ticks_ms(), -bm280_retry_interval_ms
-                        )
-                        # Recovery failed - sensor unavailable for this cycle
-                        unavailable_msg = {
-                            "timestamp": timestamp,
-                            "status": "warning",
-                            "sensor": "bm280",
-                            "message": "BM280 unavailable after recovery attempts",
-                        }
-                        print(json.dumps(unavailable_msg))
-
-            # Always try to read MQ135
-            if mq135 is not None:
-                try:
-                    mq135_data = mq135.get_all_readings()
-                    sensor_data["mq135"] = mq135_data
-                    mq135_read_ok = True
-                except Exception as e:
-                    # MQ135 error - output as JSON
-                    error_data = {
-                        "timestamp": timestamp,
-                        "status": "error",
-                        "sensor": "mq135",
-                        "error": "MQ135 read error",
-                        "details": str(e),
-                    }
-                    print(json.dumps(error_data))
-
-            # Output JSON to USB serial
-            print(json.dumps(sensor_data))
-
-            # Blink LED pattern based on which sensors read successfully
-            # 1 blink = BM280 only, 2 blinks = MQ135 only, 3 blinks = both
-            if led is not None:
-                if bm280_read_ok and mq135_read_ok:
-                    blink_pattern(led, 3)  # Both sensors OK
-                elif bm280_read_ok:
-                    blink_pattern(led, 1)  # BM280 only
-                elif mq135_read_ok:
-                    blink_pattern(led, 2)  # MQ135 only
-                else:
-                    blink_error(led)  # Neither sensor read OK
-
-            # Periodic garbage collection (from config)
-            iteration_count += 1
-            if iteration_count % GC_COLLECT_INTERVAL == 0:
-                gc.collect()
-
-            # Wait for next reading (from config)
-            time.sleep(SENSOR_READ_INTERVAL_SEC)
-
-        except KeyboardInterrupt:
-            stop_msg = {
-                "timestamp": time.ticks_ms() / 1000.0,
-                "status": "stopped",
-                "message": "Monitoring stopped by user",
-            }
-            print(json.dumps(stop_msg))
-            return
-        except Exception as e:
-            # Other unexpected errors - always output as JSON
-            error_data = {
-                "timestamp": time.ticks_ms() / 1000.0,
-                "status": "error",
-                "error": "Unexpected error",
-                "details": str(e),
-                "type": type(e).__name__,
-            }
-            print(json.dumps(error_data))
-            time.sleep(SENSOR_READ_INTERVAL_SEC)
+    gc.threshold(gc.mem_free() // 4 + gc.mem_alloc())
+    _run_loop(bm280, mq135, spi, cs_pin, led, boot_ms, BATCH_SIZE)
 
 
 # This runs automatically when Pico boots
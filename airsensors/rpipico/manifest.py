@@ -0,0 +1,17 @@
+# Frozen-module manifest for a custom Raspberry Pi Pico MicroPython build.
+#
+# Freezing lib/ stores the sensor drivers and config as bytecode in flash,
+# where it executes in place instead of being compiled into the GC heap at
+# every boot.
+#
+# Build from a MicroPython checkout:
+#   cd micropython/ports/rp2
+#   make BOARD=RPI_PICO FROZEN_MANIFEST=/path/to/airsensors/rpipico/manifest.py
+#
+# Then deploy with FROZEN_LIB=1 ./copy_to_pico.sh and delete any old lib/
+# directory from the Pico: the filesystem is searched before frozen modules,
+# so a copied lib/ would shadow the frozen one.
+
+include("$(PORT_DIR)/boards/manifest.py")
+
+package("lib")
@@ -4,10 +4,30 @@ Direct SPI diagnostic for BME280
 Run this on the Pico to test SPI communication and calibration data
 """
 import json
+import sys
 import time
 from machine import Pin, SPI
 
-print(json.dumps({"test": "BME280_SPI_DIRECT_DIAGNOSTIC"}))
+
+# Output lines are collected and written in one go by _flush(), so the
+# whole report goes out as one USB write instead of one per message
+_out = []
+
+
+def _emit(obj):
+    """Queue obj as a JSON line for the final _flush()"""
+    _out.append(json.dumps(obj))
+
+
+def _flush():
+    """Write all queued JSON lines to USB serial at once"""
+    if _out:
+        _out.append("")
+        sys.stdout.write("\n".join(_out))
+        _out.clear()
+
+
+_emit({"test": "BME280_SPI_DIRECT_DIAGNOSTIC"})
 
 # Config from lib.config
 SPI_BUS = 0
@@ -17,7 +37,7 @@ SPI_MISO_PIN = 16
 SPI_CS_PIN = 17
 SPI_FREQ = 1000000
 
-print(json.dumps({
+_emit({
     "step": 1,
     "action": "Initialize SPI",
     "pins": {
@@ -27,7 +47,7 @@ print(json.dumps({
         "cs": SPI_CS_PIN,
         "freq": SPI_FREQ
     }
-}))
+})
 
 try:
     spi = SPI(
@@ -41,16 +61,20 @@ try:
     )
     cs = Pin(SPI_CS_PIN, Pin.OUT)
     cs.on()
-    print(json.dumps({"status": "spi_initialized", "ok": True}))
+    _emit({"status": "spi_initialized", "ok": True})
 except Exception as e:
-    print(json.dumps({"status": "spi_init_failed", "error": str(e)}))
-    import sys
-    sys.exit(1)
+    _emit({"status": "spi_init_failed", "error": str(e)})
+    # Keep going: each remaining step reports its own failure, so one run
+    # still produces the full report instead of stopping here
+    spi = None
+    cs = None
 
 # Step 2: Read Chip ID (0xD0)
-print(json.dumps({"step": 2, "action": "Read Chip ID from register 0xD0"}))
+_emit({"step": 2, "action": "Read Chip ID from register 0xD0"})
 
 def read_register(reg):
+    if spi is None:
+        raise OSError("SPI not initialized")
     try:
         cs.off()
         time.sleep(0.001)
@@ -67,19 +91,21 @@ def read_register(reg):
 
 try:
     chip_id = read_register(0xD0)
-    print(json.dumps({
+    _emit({
         "status": "chip_id_read",
         "chip_id": f"0x{chip_id:02X}",
         "expected": "0x60 (BME280) or 0x58 (BMP280)",
         "valid": chip_id in (0x60, 0x58)
-    }))
+    })
 except Exception as e:
-    print(json.dumps({"status": "chip_id_read_failed", "error": str(e)}))
+    _emit({"status": "chip_id_read_failed", "error": str(e)})
 
 # Step 3: Read Calibration Data (0x88-0xA1)
-print(json.dumps({"step": 3, "action": "Read Calibration Data"}))
+_emit({"step": 3, "action": "Read Calibration Data"})
 
 def read_registers(reg, count):
+    if spi is None:
+        raise OSError("SPI not initialized")
     try:
         cs.off()
         time.sleep(0.001)
@@ -101,7 +127,7 @@ try:
     # Parse temperature calibration
     dig_T1 = calib_data[1] << 8 | calib_data[0]
 
-    print(json.dumps({
+    _emit({
         "status": "calibration_data_read",
         "bytes_read": len(calib_data),
         "first_10_bytes": [f"0x{b:02X}" for b in calib_data[:10]],
@@ -109,61 +135,62 @@ try:
         "dig_T1_hex": f"0x{dig_T1:04X}",
         "all_zero": all(b == 0x00 for b in calib_data),
         "all_ff": all(b == 0xFF for b in calib_data)
-    }))
+    })
 
     if all(b == 0x00 for b in calib_data):
-        print(json.dumps({
+        _emit({
             "error": "CRITICAL: Calibration data is all zeros!",
             "diagnosis": "SPI communication is broken - sensor not responding"
-        }))
+        })
     elif all(b == 0xFF for b in calib_data):
-        print(json.dumps({
+        _emit({
             "error": "CRITICAL: Calibration data is all 0xFF!",
             "diagnosis": "CS pin not working or SPI bus not initialized"
-        }))
+        })
     elif dig_T1 == 0:
-        print(json.dumps({
+        _emit({
             "error": "CRITICAL: Temperature calibration (dig_T1) is zero!",
             "diagnosis": "Sensor not responding to SPI reads"
-        }))
+        })
     elif dig_T1 > 50000:
-        print(json.dumps({
+        _emit({
             "error": "WARNING: dig_T1 seems high",
             "diagnosis": "Might be data corruption - check SPI timing"
-        }))
+        })
 
 except Exception as e:
-    print(json.dumps({"status": "calibration_read_failed", "error": str(e)}))
+    _emit({"status": "calibration_read_failed", "error": str(e)})
 
 # Step 4: Read Humidity Calibration (0xA1, 0xE1-0xE7)
-print(json.dumps({"step": 4, "action": "Read Humidity Calibration"}))
+_emit({"step": 4, "action": "Read Humidity Calibration"})
 
 try:
     dig_H1 = read_register(0xA1)
     calib_H = read_registers(0xE1, 7)
 
-    print(json.dumps({
+    _emit({
         "status": "humidity_calib_read",
         "dig_H1": dig_H1,
         "H_bytes_read": len(calib_H),
         "H_first_5": [f"0x{b:02X}" for b in calib_H[:5]]
-    }))
+    })
 
 except Exception as e:
-    print(json.dumps({"status": "humidity_calib_failed", "error": str(e)}))
+    _emit({"status": "humidity_calib_failed", "error": str(e)})
 
 # Step 5: Read Status Register (0xF3)
-print(json.dumps({"step": 5, "action": "Read Status Register"}))
+_emit({"step": 5, "action": "Read Status Register"})
 
 try:
     status = read_register(0xF3)
-    print(json.dumps({
+    _emit({
         "status": "status_read",
         "value": f"0x{status:02X}",
         "measuring": bool(status & 0x01),
         "im_update": bool(status & 0x02)
-    }))
+    })
 except Exception as e:
-    print(json.dumps({"status": "status_read_failed", "error": str(e)}))
+    _emit({"status": "status_read_failed", "error": str(e)})
 
-print(json.dumps({"step": "complete", "status": "diagnostic_finished"}))
+_emit({"step": "complete", "status": "diagnostic_finished"})
+_flush()
@@ -17,16 +17,24 @@ import os
 import sys
 import json
 import time
+import base64
 import logging
 import argparse
 import re
+import hashlib
 import requests
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Tuple, Optional
 from queue import Queue
+from collections import OrderedDict
 import threading
 from dotenv import load_dotenv
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -2945,6 +2953,64 @@ def get_config() -> Response:
         return jsonify({"error": str(e)}), 500
 
 
+def _capture_webcam_image(overrides: Optional[Dict[str, Any]] = None) -> Tuple[bytes, str, str]:
+    """Fetches a JPEG snapshot from the ESP32-CAM.
+
+    Args:
+        overrides: Optional camera settings merged over the default payload.
+
+    Returns:
+        A tuple of the raw JPEG bytes, the capture timestamp and the image MD5.
+
+    Raises:
+        requests.RequestException: If the camera request fails.
+    """
+    # Load config
+    with open(os.path.join(os.path.dirname(__file__), 'config.json'), 'r') as f:
+        config = json.load(f)
+
+    webcam_url = config.get('webcam', {}).get('url', 'http://192.168.50.3/snapshot')
+
+    # Prepare the camera payload defaults.
+    payload = {
+        "resolution": "UXGA (1600x1200)",
+        "quality": 10,
+        "flash": False,
+        "brightness": 0,
+        "contrast": 0,
+        "saturation": 0,
+        "exposure": 300,
+        "gain": 0,
+        "special_effect": 0,
+        "wb_mode": 0,
+        "hmirror": False,
+        "vflip": False,
+        "timestamp": datetime.now().astimezone().isoformat(),
+        "api_endpoint": webcam_url,
+        "method": "POST",
+        "content_type": "application/json"
+    }
+    if isinstance(overrides, dict):
+        payload.update(overrides)
+
+    logger.info(f"Webcam capture payload: {json.dumps(payload)}")
+
+    headers = {
+        'Content-Type': 'application/json',
+        'Accept': 'image/jpeg',
+        'Cache-Control': 'no-cache',
+        'Pragma': 'no-cache',
+        'Connection': 'close'
+    }
+    response = requests.post(webcam_url, json=payload, headers=headers, timeout=20)
+    response.raise_for_status()
+
+    image_data = response.content
+    md5 = hashlib.md5(image_data).hexdigest()
+    logger.info(f"Webcam response: bytes={len(image_data)} md5={md5}")
+    return image_data, payload["timestamp"], md5
+
+
 @app.route("/webcam/capture", methods=['POST'])
 def capture_webcam() -> Response:
     """Captures an image from the ESP32-CAM via a POST request.
@@ -2956,69 +3022,20 @@ def capture_webcam() -> Response:
         A JSON response containing the base64-encoded image and metadata,
         or an error message if the capture fails.
     """
-    import base64
-    import json
-    import os
-    import requests
-    from datetime import datetime, timezone
-    
     try:
-        # Load config
-        with open(os.path.join(os.path.dirname(__file__), 'config.json'), 'r') as f:
-            config = json.load(f)
-        
-        webcam_url = config.get('webcam', {}).get('url', 'http://192.168.50.3/snapshot')
-        
-        # Prepare the camera payload defaults.
-        payload = {
-            "resolution": "UXGA (1600x1200)",
-            "quality": 10,
-            "flash": False,
-            "brightness": 0,
-            "contrast": 0,
-            "saturation": 0,
-            "exposure": 300,
-            "gain": 0,
-            "special_effect": 0,
-            "wb_mode": 0,
-            "hmirror": False,
-            "vflip": False,
-            "timestamp": datetime.now().astimezone().isoformat(),
-            "api_endpoint": webcam_url,
-            "method": "POST",
-            "content_type": "application/json"
-        }
         # Merge user overrides (from frontend/backend caller)
         try:
-            req_payload= request.get_json(silent=True) or {}
-            if isinstance(req_payload, dict):
-                payload.update(req_payload)
+            overrides = request.get_json(silent=True) or {}
         except Exception:
-            pass
-        
-        logger.info(f"Webcam capture payload: {json.dumps(payload)}")
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'Accept': 'image/jpeg',
-            'Cache-Control': 'no-cache',
-            'Pragma': 'no-cache',
-            'Connection': 'close'
-        }
-        import time, hashlib
-        params = {'ts': int(time.time()*1000)}
-        response = requests.post(webcam_url, json=payload, headers=headers, timeout=20)
-        response.raise_for_status()
-
-        image_data = response.content
-        md5 = hashlib.md5(image_data).hexdigest()
-        logger.info(f"Webcam response: bytes={len(image_data)} md5={md5}")
+            overrides = {}
+
+        image_data, timestamp, md5 = _capture_webcam_image(overrides)
         image_base64 = base64.b64encode(image_data).decode('utf-8')
 
         return jsonify({
             "success": True,
             "image": f"data:image/jpeg;base64,{image_base64}",
-            "timestamp": payload["timestamp"],
+            "timestamp": timestamp,
             "md5": md5,
             "source": "ESP32-CAM POST API"
         })
@@ -3030,6 +3047,26 @@ def capture_webcam() -> Response:
         }), 500
 
 
+def _json_response(obj: Dict[str, Any], status: int = 200) -> Response:
+    """Serializes obj with orjson when installed, falling back to jsonify.
+
+    OCR responses carry the whole base64 image, where orjson is much faster
+    than the stdlib encoder behind jsonify.
+    """
+    if orjson is None:
+        response = jsonify(obj)
+        response.status_code = status
+        return response
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+_OCR_CACHE_SIZE = 32  # recent images whose OCR text is kept
+_ocr_cache = OrderedDict()  # (model, blake2b of image) -> OCR text, oldest first
+_ocr_cache_lock = threading.Lock()
+_DIGITS_RE = re.compile(r'\d+')
+_FOUR_DIGITS_RE = re.compile(r'(?<!\d)\d{4}(?!\d)')
+
+
 @app.route("/webcam/ocr", methods=['POST'])
 def run_ocr() -> Response:
     """Captures a fresh image and runs OCR on it using Google Cloud Vision API.
@@ -3042,31 +3079,22 @@ def run_ocr() -> Response:
         A JSON response with the OCR result, including the meter value,
         or an error message if the process fails.
     """
-    import base64
-    import json
-    import os
-    import requests
-    from datetime import datetime
-
     try:
         logger.info("Starting OCR process...")
-        # Capture a fresh image
-        with app.test_client() as client:
-            logger.info("Capturing fresh image for OCR...")
-            cap_resp = client.post('/webcam/capture')
-            cap_json = cap_resp.get_json()
-        if not cap_json.get('success'):
-            logger.error(f"Failed to capture image for OCR: {cap_json.get('error')}")
-            return jsonify({
+        # Capture a fresh image directly rather than through /webcam/capture,
+        # so the JPEG is base64-encoded once and never round-trips through JSON
+        logger.info("Capturing fresh image for OCR...")
+        try:
+            image_data, _, _ = _capture_webcam_image()
+        except Exception as capture_err:
+            logger.error(f"Failed to capture image for OCR: {capture_err}")
+            return _json_response({
                 "success": False,
                 "error": "Failed to capture image for OCR"
-            }), 500
+            }, 500)
 
-        # Decode base64
-        image_b64 = cap_json['image']
-        prefix = 'data:image/jpeg;base64,'
-        if image_b64.startswith(prefix):
-            image_b64 = image_b64[len(prefix):]
+        image_b64 = base64.b64encode(image_data).decode('ascii')
+        image_uri = f"data:image/jpeg;base64,{image_b64}"
 
         # Use Google Gemini API with configurable model selection.
         try:
@@ -3090,93 +3118,106 @@ def run_ocr() -> Response:
             if not api_key:
                 raise Exception("Google API key not configured. Set GOOGLE_API_KEY environment variable or add to .env file.")
 
-            payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {
-                                "text": (
-                                    "You are reading a mechanical electricity meter. "
-                                    "The image shows a dark horizontal band with exactly 4 white digits on rotating wheels.\n\n"
-                                    "The photo may be slightly blurry — that is expected and acceptable. "
-                                    "Read the digits as a human would: look at the overall shape of each number, not pixel-perfect sharpness.\n\n"
-                                    "RULES:\n"
-                                    "1. Focus on the dark display band — the 4 white/light digits are your target.\n"
-                                    "2. Read left to right. Each wheel shows one digit 0–9.\n"
-                                    "3. If a wheel is mid-rotation (halfway between two digits), read the lower digit.\n"
-                                    "4. If you can identify all 4 digits with reasonable confidence, respond with ONLY those 4 digits — nothing else. Example: 9772\n"
-                                    "5. Only respond with UNREADABLE if a digit is completely impossible to determine "
-                                    "(e.g. fully obscured, pitch black, or totally smeared beyond recognition).\n\n"
-                                    "Do NOT hallucinate. Do NOT guess randomly. But DO read what a human could read from this image."
-                                )
-                            },
-                            {
-                                "inline_data": {
-                                    "mime_type": "image/jpeg",
-                                    "data": image_b64
+            # The webcam often returns the same frame between runs; reuse the
+            # previous answer for identical image content instead of calling Gemini
+            cache_key = (gemini_model, hashlib.blake2b(image_data, digest_size=16).digest())
+            with _ocr_cache_lock:
+                ocr_text = _ocr_cache.get(cache_key)
+                if ocr_text is not None:
+                    _ocr_cache.move_to_end(cache_key)
+
+            if ocr_text is not None:
+                logger.info("Image unchanged since a previous OCR run, using cached result")
+            else:
+                payload = {
+                    "contents": [
+                        {
+                            "parts": [
+                                {
+                                    "text": (
+                                        "You are reading a mechanical electricity meter. "
+                                        "The image shows a dark horizontal band with exactly 4 white digits on rotating wheels.\n\n"
+                                        "The photo may be slightly blurry — that is expected and acceptable. "
+                                        "Read the digits as a human would: look at the overall shape of each number, not pixel-perfect sharpness.\n\n"
+                                        "RULES:\n"
+                                        "1. Focus on the dark display band — the 4 white/light digits are your target.\n"
+                                        "2. Read left to right. Each wheel shows one digit 0–9.\n"
+                                        "3. If a wheel is mid-rotation (halfway between two digits), read the lower digit.\n"
+                                        "4. If you can identify all 4 digits with reasonable confidence, respond with ONLY those 4 digits — nothing else. Example: 9772\n"
+                                        "5. Only respond with UNREADABLE if a digit is completely impossible to determine "
+                                        "(e.g. fully obscured, pitch black, or totally smeared beyond recognition).\n\n"
+                                        "Do NOT hallucinate. Do NOT guess randomly. But DO read what a human could read from this image."
+                                    )
+                                },
+                                {
+                                    "inline_data": {
+                                        "mime_type": "image/jpeg",
+                                        "data": image_b64
+                                    }
                                 }
-                            }
-                        ]
-                    }
-                ]
-            }
+                            ]
+                        }
+                    ]
+                }
 
-            gemini_url = f"https://generativelanguage.googleapis.com/v1beta/models/{gemini_model}:generateContent?key={api_key}"
-            logger.info(f"Sending request to Google Gemini API model: {gemini_model}")
-            ocr_response = requests.post(
-                gemini_url,
-                headers={"Content-Type": "application/json"},
-                json=payload,
-                timeout=30
-            )
-            ocr_response.raise_for_status()
+                gemini_url = f"https://generativelanguage.googleapis.com/v1beta/models/{gemini_model}:generateContent?key={api_key}"
+                logger.info(f"Sending request to Google Gemini API model: {gemini_model}")
+                ocr_response = requests.post(
+                    gemini_url,
+                    headers={"Content-Type": "application/json"},
+                    json=payload,
+                    timeout=30
+                )
+                ocr_response.raise_for_status()
 
-            result = ocr_response.json()
+                result = ocr_response.json()
 
-            # Check for errors in response
-            if 'error' in result:
-                error_msg = result['error'].get('message', 'Unknown error')
-                logger.error(f"Gemini API error: {error_msg}")
-                return jsonify({
-                    "success": False,
-                    "engine": engine_name,
-                    "image": cap_json['image'],
-                    "timestamp": datetime.now().isoformat() + "Z",
-                    "error": f"Gemini API error: {error_msg}"
-                }), 500
-
-            # Extract text from response
-            ocr_text = ""
-            if 'candidates' in result and len(result['candidates']) > 0:
-                candidate = result['candidates'][0]
-                if 'content' in candidate and 'parts' in candidate['content']:
-                    for part in candidate['content']['parts']:
-                        if 'text' in part:
-                            ocr_text = part['text'].strip()
-                            break
+                # Check for errors in response
+                if 'error' in result:
+                    error_msg = result['error'].get('message', 'Unknown error')
+                    logger.error(f"Gemini API error: {error_msg}")
+                    return _json_response({
+                        "success": False,
+                        "engine": engine_name,
+                        "image": image_uri,
+                        "timestamp": datetime.now().isoformat() + "Z",
+                        "error": f"Gemini API error: {error_msg}"
+                    }, 500)
+
+                # Extract text from response
+                ocr_text = ""
+                if 'candidates' in result and len(result['candidates']) > 0:
+                    candidate = result['candidates'][0]
+                    if 'content' in candidate and 'parts' in candidate['content']:
+                        for part in candidate['content']['parts']:
+                            if 'text' in part:
+                                ocr_text = part['text'].strip()
+                                break
+
+                # Only cache usable readings: Gemini answers vary between calls,
+                # so UNREADABLE or digit-less replies must be retried, not replayed
+                if _FOUR_DIGITS_RE.search(ocr_text):
+                    with _ocr_cache_lock:
+                        _ocr_cache[cache_key] = ocr_text
+                        if len(_ocr_cache) > _OCR_CACHE_SIZE:
+                            _ocr_cache.popitem(last=False)
 
             logger.info(f"Raw OCR output: {ocr_text}")
 
             if not ocr_text:
                 logger.warning("No text detected in image")
-                return jsonify({
+                return _json_response({
                     "success": False,
                     "engine": engine_name,
-                    "image": cap_json['image'],
+                    "image": image_uri,
                     "timestamp": datetime.now().isoformat() + "Z",
                     "raw_ocr": ocr_text,
                     "error": "No text detected in image"
                 })
 
-            # Extract numbers from response
-            numbers = re.findall(r'\d+', ocr_text)
-
-            # Find exactly 4-digit number (meter reading)
-            four_digit = None
-            for num in numbers:
-                if len(num) == 4:
-                    four_digit = num
-                    break
+            # Find the first run of exactly 4 digits (meter reading) in one scan
+            match = _FOUR_DIGITS_RE.search(ocr_text)
+            four_digit = match.group() if match else None
 
             if four_digit:
                 meter_value_with_prefix = "2" + four_digit
@@ -3186,21 +3227,21 @@ def run_ocr() -> Response:
                     meter_int = int(meter_value_with_prefix)
                     if meter_int < 20000:
                         logger.warning(f"❌ Reading {meter_value_with_prefix} below minimum threshold 20000")
-                        return jsonify({
+                        return _json_response({
                             "success": False,
                             "error": f"Reading {meter_value_with_prefix} is below minimum threshold 20000",
                             "engine": engine_name,
-                            "image": cap_json['image'],
+                            "image": image_uri,
                             "timestamp": datetime.now().isoformat() + "Z",
                             "raw_ocr": ocr_text
                         })
                 except ValueError:
                     logger.error(f"Failed to parse meter value: {meter_value_with_prefix}")
-                    return jsonify({
+                    return _json_response({
                         "success": False,
                         "error": f"Invalid meter value format: {meter_value_with_prefix}",
                         "engine": engine_name,
-                        "image": cap_json['image'],
+                        "image": image_uri,
                         "timestamp": datetime.now().isoformat() + "Z",
                         "raw_ocr": ocr_text
                     })
@@ -3215,21 +3256,21 @@ def run_ocr() -> Response:
                             diff = meter_int - prev_int
                             if diff < 0:
                                 logger.warning(f"❌ Reading went backwards: {prev_int} → {meter_int}")
-                                return jsonify({
+                                return _json_response({
                                     "success": False,
                                     "error": f"Invalid: meter decreased from {prev_int} to {meter_int}",
                                     "engine": engine_name,
-                                    "image": cap_json['image'],
+                                    "image": image_uri,
                                     "timestamp": datetime.now().isoformat() + "Z",
                                     "raw_ocr": ocr_text
                                 })
                             elif diff > 100:
                                 logger.warning(f"❌ Reading jumped too much: {prev_int} → {meter_int} (diff: {diff})")
-                                return jsonify({
+                                return _json_response({
                                     "success": False,
                                     "error": f"Invalid: meter jumped {diff} units (max 100 allowed). Previous: {prev_int}, Current: {meter_int}",
                                     "engine": engine_name,
-                                    "image": cap_json['image'],
+                                    "image": image_uri,
                                     "timestamp": datetime.now().isoformat() + "Z",
                                     "raw_ocr": ocr_text
                                 })
@@ -3249,30 +3290,30 @@ def run_ocr() -> Response:
                     )
                     logger.info(f"✅ Saved meter reading to database: {meter_value_with_prefix}")
 
-                    return jsonify({
+                    return _json_response({
                         "success": True,
                         "index": meter_value_with_prefix,
                         "engine": engine_name,
-                        "image": cap_json['image'],
+                        "image": image_uri,
                         "timestamp": datetime.now().isoformat() + "Z",
                         "raw_ocr": ocr_text
                     })
                 except Exception as db_err:
                     logger.error(f"Failed to save meter reading to database: {db_err}")
-                    return jsonify({
+                    return _json_response({
                         "success": False,
                         "error": f"OCR succeeded but database save failed: {str(db_err)}",
                         "engine": engine_name,
-                        "image": cap_json['image'],
+                        "image": image_uri,
                         "timestamp": datetime.now().isoformat() + "Z",
                         "raw_ocr": ocr_text
-                    }), 500
+                    }, 500)
             else:
-                logger.warning(f"No 4-digit number found. Numbers detected: {numbers}")
-                return jsonify({
+                logger.warning(f"No 4-digit number found. Numbers detected: {_DIGITS_RE.findall(ocr_text)}")
+                return _json_response({
                     "success": False,
                     "engine": engine_name,
-                    "image": cap_json['image'],
+                    "image": image_uri,
                     "timestamp": datetime.now().isoformat() + "Z",
                     "raw_ocr": ocr_text,
                     "error": "No 4-digit number found in response"
@@ -3280,20 +3321,20 @@ def run_ocr() -> Response:
 
         except Exception as ocr_error:
             logger.error(f"Google Gemini API OCR error: {ocr_error}")
-            return jsonify({
+            return _json_response({
                 "success": False,
                 "error": f"OCR failed: {str(ocr_error)}",
                 "engine": f"{engine_name} - Error",
-                "image": cap_json['image'],
+                "image": image_uri,
                 "timestamp": datetime.now().isoformat() + "Z"
             })
     except Exception as e:
         logger.error(f"Index reading failed: {e}")
-        return jsonify({
+        return _json_response({
             "success": False,
             "error": f"Reading index failed: {str(e)}",
             "engine": "Error"
-        }), 500
+        }, 500)
 
 
 @app.route("/snapshot", methods=['GET', 'POST'])
@@ -11,6 +11,70 @@ except ImportError:
     serial = None
     list_ports = None
 
+# MQ135 conversion constants, mirroring airsensors/rpipico/lib/config.py.
+# Used when the Pico runs with MQ135_RAW_ONLY and sends only raw ADC counts.
+MQ135_ADC_MAX_VALUE = 65535
+MQ135_VOLTAGE_REFERENCE = 3.3
+MQ135_MIN_VOLTAGE = 0.01
+MQ135_EPSILON = 1e-6  # float comparison epsilon used by lib/mq135.py
+MQ135_ADC_SCALE = MQ135_VOLTAGE_REFERENCE / MQ135_ADC_MAX_VALUE
+MQ135_DEFAULT_R_ZERO = 42304.5
+MQ135_DEFAULT_R_LOAD = 10000.0
+MQ135_CURVES = {
+    # gas: (A, B, max_ppm) for ppm = A * ratio ** B
+    'co2_ppm': (116.6020682, -2.769034857, 10000),
+    'nh3_ppm': (102.694, -2.815, 500),
+    'alcohol_ppm': (77.255, -3.18, 1000),
+}
+MQ135_AQ_LEVELS = (
+    (400, 'Excellent', 1),
+    (600, 'Good', 2),
+    (1000, 'Fair', 3),
+    (1500, 'Poor', 4),
+    (2500, 'Very Poor', 5),
+)
+
+
+def mq135_values_from_raw(raw: int, r_zero: float, r_load: float) -> Dict[str, Any]:
+    """Derives MQ135 readings from a raw ADC count, as the Pico firmware would.
+
+    Args:
+        raw: The 16-bit ADC reading.
+        r_zero: Sensor resistance in clean air, in ohms.
+        r_load: Load resistor value, in ohms.
+
+    Returns:
+        A dictionary with the same keys as the firmware's full mq135 object.
+    """
+    # Same thresholds and epsilon checks as MQ135.read_values() on the Pico
+    voltage = raw * MQ135_ADC_SCALE
+    if voltage < MQ135_MIN_VOLTAGE + MQ135_EPSILON:
+        resistance = None
+        ratio = 0.0
+    else:
+        resistance = ((MQ135_VOLTAGE_REFERENCE - voltage) / voltage) * r_load
+        ratio = 0.0 if abs(r_zero) < MQ135_EPSILON else resistance / r_zero
+
+    values: Dict[str, Any] = {
+        'raw_adc': raw,
+        'voltage_v': round(voltage, 3),
+        'resistance_ohm': round(resistance, 1) if resistance is not None else None,
+        'ratio_rs_r0': round(ratio, 3),
+    }
+    ppms = {}
+    for key, (a, b, max_ppm) in MQ135_CURVES.items():
+        ppm = 0 if ratio < MQ135_EPSILON else a * (ratio ** b)
+        ppms[key] = max(0, min(max_ppm, ppm))
+        values[key] = round(ppms[key], 1)
+
+    # Classified on the unrounded CO2 value, as the firmware does
+    values['air_quality_status'], values['air_quality_index'] = 'Hazardous', 6
+    for limit, status, index in MQ135_AQ_LEVELS:
+        if ppms['co2_ppm'] < limit:
+            values['air_quality_status'], values['air_quality_index'] = status, index
+            break
+    return values
+
 
 class USBJSONReader:
     """Reads line-delimited JSON from a USB CDC serial device.
@@ -22,10 +86,13 @@ class USBJSONReader:
 
     Expected JSON format:
       {
-        "timestamp": <seconds>,
+        "timestamp_ms": <device ticks in milliseconds>,
         "bme280": {"temperature_c": 23.4, "humidity_percent": 55.0, ...},
         "mq135": {"co2_ppm": 560.0, "air_quality_index": 3, ...}
       }
+
+    When the Pico runs with MQ135_RAW_ONLY, "mq135" carries only "raw_adc"
+    and the remaining MQ135 fields are derived here.
     """
 
     def __init__(
@@ -65,6 +132,13 @@ class USBJSONReader:
         self._last_data_time = None
         self._reconnect_count = 0
         self._lock = threading.Lock()
+        # MQ135 calibration, updated from the Pico's mq135_initialized message
+        self._mq135_r_zero = MQ135_DEFAULT_R_ZERO
+        self._mq135_r_load = MQ135_DEFAULT_R_LOAD
+        # False until mq135_initialized is seen, e.g. after a backend restart
+        # while the Pico keeps running; raw readings then use the defaults
+        self._mq135_calibrated = False
+        self._mq135_default_warned = False
 
     def detect_device(self) -> Optional[str]:
         """Auto-detects the serial device.
@@ -486,9 +560,27 @@ class USBJSONReader:
         Returns:
             A standardized dictionary containing sensor data.
         """
-        ts = payload.get('timestamp', time.time())
+        if 'timestamp_ms' in payload:
+            ts = payload['timestamp_ms'] / 1000.0
+        else:
+            ts = payload.get('timestamp', time.time())
+        if payload.get('status') == 'mq135_initialized':
+            self._mq135_r_zero = payload.get('r_zero', self._mq135_r_zero)
+            self._mq135_r_load = payload.get('r_load', self._mq135_r_load)
+            self._mq135_calibrated = True
         bm = payload.get('bme280', {})
         mq = payload.get('mq135', {})
+        if 'raw_adc' in mq and 'co2_ppm' not in mq:
+            # Raw-only firmware mode: derive the readings here instead of on the Pico
+            if not self._mq135_calibrated and not self._mq135_default_warned:
+                if self.logger:
+                    self.logger.warning(
+                        'USBJSONReader: MQ135 raw readings received before the Pico sent its '
+                        f'calibration; converting with default r_zero={self._mq135_r_zero} '
+                        f'r_load={self._mq135_r_load} until mq135_initialized is seen (reset the Pico to resend it)'
+                    )
+                self._mq135_default_warned = True
+            mq = mq135_values_from_raw(mq['raw_adc'], self._mq135_r_zero, self._mq135_r_load)
         result = {
             'timestamp': ts,
             'temperature_c': bm.get('temperature_c'),
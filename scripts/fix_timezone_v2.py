@@ -5,34 +5,26 @@ Fixes chart data not refreshing and ensures proper timezone display
 """
 
 import re
+import mmap
 import shutil
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-def backup_file(filepath):
-    """Create a backup of the original file"""
-    backup_path = f"{filepath}.backup_v2_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    shutil.copy2(filepath, backup_path)
-    print(f"✅ Backup created: {backup_path}")
-    return backup_path
+# All force_chart_refresh rewrites as one alternation, compiled once at import,
+# so the file is scanned a single time; the named group says which one matched
+_CHART_EDITS_RE = re.compile(
+    r'(?P<co2>function updateCO2HistoryChart\(\) \{[^}]+\})'
+    r'|(?P<pressure>function updatePressureHistoryChart\(\) \{[^}]+\})'
+    r'|(?P<marker>updateCO2HistoryChart\(\);)',
+    re.DOTALL
+)
 
-def force_chart_refresh(filepath):
-    """Add code to force chart refresh and clear cached labels"""
-    
-    print("🔄 Adding chart refresh logic...")
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    original_content = content
-    
-    # Find the chart update functions and add chart destruction/recreation
-    # This will force the charts to refresh with new timestamp formatting
-    
-    # Enhanced CO2 chart update function
-    co2_update_pattern = r'(function updateCO2HistoryChart\(\) \{[^}]+\})'
-    
-    enhanced_co2_function = """function updateCO2HistoryChart() {
+# Replacement bodies are plain strings inserted verbatim at match offsets, so
+# nothing is parsed for backreferences; built once at import
+
+# Enhanced CO2 chart update function: destroys and recreates the chart
+_ENHANCED_CO2_FUNCTION = """function updateCO2HistoryChart() {
       if (!window.historyCO2Chart || !window.historyCO2Chart.data || currentData.airQualityHistory.length === 0) return;
       
       // Destroy existing chart to force refresh
@@ -80,16 +72,9 @@ def force_chart_refresh(filepath):
         });
       }
     }"""
-    
-    # Replace the CO2 chart update function
-    if re.search(co2_update_pattern, content, re.DOTALL):
-        content = re.sub(co2_update_pattern, enhanced_co2_function, content, flags=re.DOTALL)
-        print("✅ Enhanced updateCO2HistoryChart function")
-    
-    # Also enhance the pressure chart update function
-    pressure_update_pattern = r'(function updatePressureHistoryChart\(\) \{[^}]+\})'
-    
-    enhanced_pressure_function = """function updatePressureHistoryChart() {
+
+# Enhanced pressure chart update function: refreshes labels in place
+_ENHANCED_PRESSURE_FUNCTION = """function updatePressureHistoryChart() {
       if (!window.historyPressureChart || !window.historyPressureChart.data || currentData.pressureHistory.length === 0) return;
       
       // Clear existing data and refresh with correct timestamps
@@ -98,13 +83,9 @@ def force_chart_refresh(filepath):
       window.historyPressureChart.data.datasets[0].data = sorted.map(function(i){ return i.pressureHpa; });
       window.historyPressureChart.update('active');
     }"""
-    
-    if re.search(pressure_update_pattern, content, re.DOTALL):
-        content = re.sub(pressure_update_pattern, enhanced_pressure_function, content, flags=re.DOTALL)
-        print("✅ Enhanced updatePressureHistoryChart function")
-    
-    # Add a function to refresh all charts
-    refresh_all_charts_function = """
+
+# Function to refresh all charts, inserted before updateDisplay()
+_REFRESH_ALL_CHARTS_FUNCTION = """
     // Function to refresh all charts with correct timezone
     function refreshAllChartsTimezone() {
       console.log('🕐 Refreshing all charts with correct timezone...');
@@ -124,19 +105,115 @@ def force_chart_refresh(filepath):
     }
 
 """
+
+_CHART_REPLACEMENTS = {
+    'co2': _ENHANCED_CO2_FUNCTION,
+    'pressure': _ENHANCED_PRESSURE_FUNCTION,
+    'marker': 'updateCO2HistoryChart();\n          refreshAllChartsTimezone();',
+}
+
+# In-kernel copy primitives, tried in order: copy_file_range, then sendfile
+# (file-to-file since Linux 2.6.33). Each copies up to count bytes from in_fd
+# at offset to the current position of out_fd.
+_KERNEL_COPIES = []
+if hasattr(os, 'copy_file_range'):
+    _KERNEL_COPIES.append(lambda in_fd, out_fd, offset, count: os.copy_file_range(in_fd, out_fd, count, offset))
+if hasattr(os, 'sendfile'):
+    _KERNEL_COPIES.append(lambda in_fd, out_fd, offset, count: os.sendfile(out_fd, in_fd, offset, count))
+
+def copy_file(src, dst):
+    """Copy src to dst with metadata, in-kernel via copy_file_range or sendfile where supported"""
+    for kernel_copy in _KERNEL_COPIES:
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                size = os.fstat(fsrc.fileno()).st_size
+                offset = 0
+                while offset < size:
+                    copied = kernel_copy(fsrc.fileno(), fdst.fileno(), offset, min(size - offset, 1 << 30))
+                    if copied == 0:
+                        break
+                    offset += copied
+            if offset < size:
+                raise OSError("in-kernel copy stopped early")
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            # Unsupported for this filesystem pair, try the next primitive
+            continue
+    # Non-Linux, old Python, or no in-kernel copy worked
+    shutil.copy2(src, dst)
+
+def backup_file(filepath):
+    """Create a backup of the original file"""
+    backup_path = f"{filepath}.backup_v2_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    copy_file(filepath, backup_path)
+    print(f"✅ Backup created: {backup_path}")
+    return backup_path
+
+def already_patched(filepath):
+    """Check for the fix marker by scanning the mapped file instead of reading it"""
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False  # an empty file cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm.find(b'refreshAllChartsTimezone') != -1
+
+def force_chart_refresh(filepath, content=None):
+    """Add code to force chart refresh and clear cached labels
+    
+    content is the already-read file text; when omitted the file is read here.
+    """
+    
+    print("🔄 Adding chart refresh logic...")
+    
+    # Read the whole file as bytes and decode once, skipping the text-mode
+    # incremental decoder
+    if content is None:
+        with open(filepath, 'rb') as f:
+            content = f.read().decode('utf-8')
     
-    # Add this function before the updateDisplay function
+    # Edits are collected as (start, end, replacement) offsets into the
+    # original content and applied in one join at the end, so the file text
+    # is copied once rather than once per edit
+    edits = []
+    
+    # Find the chart update functions and add chart destruction/recreation
+    # This will force the charts to refresh with new timestamp formatting
+    
+    # Replace both chart update functions and add a refresh call after data
+    # loading in one pass. Cheap literal check first so the DOTALL regex only
+    # runs if it can match.
+    matched = set()
+    
+    if 'updateCO2HistoryChart' in content or 'function updatePressureHistoryChart()' in content:
+        for match in _CHART_EDITS_RE.finditer(content):
+            matched.add(match.lastgroup)
+            edits.append((match.start(), match.end(), _CHART_REPLACEMENTS[match.lastgroup]))
+        if 'co2' in matched:
+            print("✅ Enhanced updateCO2HistoryChart function")
+        if 'pressure' in matched:
+            print("✅ Enhanced updatePressureHistoryChart function")
+    
+    # Add the refresh-all function before the updateDisplay function
     insertion_point = content.find('function updateDisplay()')
     if insertion_point > -1:
-        content = content[:insertion_point] + refresh_all_charts_function + content[insertion_point:]
+        edits.append((insertion_point, insertion_point, _REFRESH_ALL_CHARTS_FUNCTION))
         print("✅ Added refreshAllChartsTimezone function")
     
-    # Add a call to refresh charts after data loading
-    # Find where air quality history is loaded and add refresh call
-    aq_history_pattern = r'(updateCO2HistoryChart\(\);)'
-    content = re.sub(aq_history_pattern, r'\1\n          refreshAllChartsTimezone();', content)
+    # Every edit inserts text or swaps a match for a longer body, so any edit
+    # means the content changed; no full compare against the original needed
+    if not edits:
+        return None
     
-    return content if content != original_content else None
+    parts = []
+    last = 0
+    for start, end, text in sorted(edits, key=lambda edit: edit[0]):
+        parts.append(content[last:start])
+        parts.append(text)
+        last = end
+    parts.append(content[last:])
+    
+    return ''.join(parts)
 
 def main():
     """Main function"""
@@ -149,16 +226,35 @@ def main():
         print(f"❌ Frontend file not found: {frontend_file}")
         return
     
-    # Create backup
-    backup_path = backup_file(frontend_file)
+    # If the fix is already in place there is nothing to back up or read in
+    if already_patched(frontend_file):
+        print("\nℹ️  Enhanced timezone fix already applied")
+        return False
+    
+    # Read the file once; the same bytes feed force_chart_refresh
+    with open(frontend_file, 'rb') as f:
+        data = f.read()
+    
+    # Create the backup in a worker thread while the fixes are computed from
+    # the text already in memory; the two touch separate files
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        backup_future = pool.submit(backup_file, frontend_file)
+        try:
+            # Apply enhanced fixes
+            new_content = force_chart_refresh(frontend_file, data.decode('utf-8'))
+        except Exception as e:
+            # Nothing was written yet, so there is nothing to restore
+            print(f"❌ Error applying enhanced fixes: {e}")
+            return False
+    
+    # Wait for the backup before writing; a failed backup raises here, before
+    # the frontend file is touched
+    backup_path = backup_future.result()
     
     try:
-        # Apply enhanced fixes
-        new_content = force_chart_refresh(frontend_file)
-        
         if new_content:
-            with open(frontend_file, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            with open(frontend_file, 'wb') as f:
+                f.write(new_content.encode('utf-8'))
             
             print("\n🎉 Enhanced timezone fix completed!")
             print("📝 Changes applied:")
@@ -177,7 +273,7 @@ def main():
     except Exception as e:
         print(f"❌ Error applying enhanced fixes: {e}")
         print("🔄 Restoring from backup...")
-        shutil.copy2(backup_path, frontend_file)
+        copy_file(backup_path, frontend_file)
         print("✅ Original file restored")
         return False
 